@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+"""
+python -m src 入口，等价于 python src/vtw.py
+"""
+
+from .vtw import main
+
+if __name__ == '__main__':
+    main()
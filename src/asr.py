@@ -3,17 +3,45 @@
 使用 faster-whisper 进行本地语音识别
 """
 
+import hashlib
+import io
+import json
 import os
+import functools
 import logging
+import shutil
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Iterator, Optional, Dict, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 try:
     from faster_whisper import WhisperModel
 except ImportError:
     WhisperModel = None
 
-from config import config
+try:
+    # 批量推理管线（faster-whisper >= 1.0.3）
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+try:
+    # PyAV 解码，不依赖外部 ffmpeg 可执行文件
+    from faster_whisper.audio import decode_audio
+except ImportError:
+    decode_audio = None
+
+try:  # 包方式运行（python -m src.vtw）
+    from .config import config
+except ImportError:  # 脚本方式运行（python src/vtw.py）
+    from config import config
 
 # 设置 Hugging Face 镜像（国内用户）
 os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'
@@ -21,6 +49,178 @@ os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'
 logger = logging.getLogger(__name__)
 
 
+# Whisper 可直接解码的常见音频格式
+_AUDIO_EXTENSIONS = {'.m4a', '.mp3', '.webm', '.opus', '.aac', '.wav', '.flac'}
+
+# 按 BV 号加锁，避免并发调用重复下载同一视频的音频
+_extract_locks: Dict[str, threading.Lock] = {}
+_extract_locks_guard = threading.Lock()
+
+
+def _bvid_lock(bvid: str) -> threading.Lock:
+    """获取指定 BV 号的提取锁"""
+    with _extract_locks_guard:
+        lock = _extract_locks.get(bvid)
+        if lock is None:
+            lock = _extract_locks[bvid] = threading.Lock()
+        return lock
+
+
+@functools.cache
+def _ffmpeg_path() -> Optional[str]:
+    """
+    查找 ffmpeg 可执行文件，结果全局缓存
+
+    依次尝试 PATH、FFMPEG_BINARY 环境变量和常见的 Winget 安装路径，
+    整个进程只探测一次文件系统。
+
+    Returns:
+        ffmpeg 路径，未找到返回 None
+    """
+    found = shutil.which('ffmpeg')
+    if found:
+        return found
+
+    env_path = os.environ.get('FFMPEG_BINARY')
+    if env_path and Path(env_path).exists():
+        return env_path
+
+    # 旧版 Winget 安装路径（Windows）
+    possible_paths = [
+        r'C:\Users\27970\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_Microsoft.Winget.Source_8wekyb3d8bbwe\ffmpeg-8.0.1-full_build\bin\ffmpeg.exe',
+        r'C:\Users\27970\AppData\Local\Microsoft\WinGet\Links\ffmpeg.exe',
+    ]
+    for path in possible_paths:
+        if Path(path).exists():
+            return path
+
+    return None
+
+
+def _audio_fingerprint(audio_file: Path) -> str:
+    """
+    计算音频文件指纹
+
+    对首尾各 1MiB 内容加文件大小做 SHA1，避免读取整个文件；
+    足以区分不同视频的音频，又使多小时的大文件指纹计算近乎即时。
+
+    Args:
+        audio_file: 音频文件路径
+
+    Returns:
+        指纹字符串（十六进制）
+    """
+    size = audio_file.stat().st_size
+    chunk = 1024 * 1024
+
+    h = hashlib.sha1()
+    h.update(str(size).encode())
+
+    with audio_file.open('rb') as f:
+        h.update(f.read(chunk))
+        if size > 2 * chunk:
+            f.seek(-chunk, os.SEEK_END)
+            h.update(f.read(chunk))
+
+    return h.hexdigest()
+
+
+class ASRCache:
+    """识别结果磁盘缓存
+
+    按音频指纹将识别结果存入 SQLite，同一音频跨运行重复识别时
+    直接返回缓存结果，省去整段 ASR 计算。
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        初始化缓存
+
+        Args:
+            db_path: SQLite 数据库路径
+        """
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS asr_cache ('
+            'fingerprint TEXT PRIMARY KEY, '
+            'result TEXT, '
+            'created_at INTEGER)'
+        )
+        self.conn.commit()
+
+    def get(self, fingerprint: str) -> Optional[Dict]:
+        """读取缓存的识别结果，未命中返回 None"""
+        row = self.conn.execute(
+            'SELECT result FROM asr_cache WHERE fingerprint = ?',
+            (fingerprint,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        try:
+            return json.loads(row[0])
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+    def set(self, fingerprint: str, result: Dict):
+        """写入识别结果"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO asr_cache VALUES (?, ?, ?)',
+            (fingerprint, json.dumps(result, ensure_ascii=False), int(time.time()))
+        )
+        self.conn.commit()
+
+
+def _dumps_jsonl_line(obj: Dict) -> bytes:
+    """将分段字典序列化为一行 JSONL（字节）"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+@functools.lru_cache(maxsize=4)
+def _get_model(
+    model_name: str,
+    device: str,
+    compute_type: str,
+    download_root: str,
+    cpu_threads: int = 0,
+    num_workers: int = 1,
+):
+    """
+    加载并缓存 Whisper 模型
+
+    模型加载需要数秒，按 (model, device, compute_type) 等参数缓存，
+    同配置的多个 ASREngine 实例共享一份模型，避免重复加载。
+
+    Args:
+        model_name: 模型名称
+        device: 设备（cpu/cuda）
+        compute_type: 计算类型
+        download_root: 模型缓存目录
+        cpu_threads: CPU 线程数（0 表示由 ctranslate2 决定）
+        num_workers: 并发 transcribe 工作数
+
+    Returns:
+        WhisperModel 实例
+    """
+    logger.info(f"正在加载 Whisper 模型: {model_name}")
+    logger.info(f"设备: {device}, 计算类型: {compute_type}")
+
+    model = WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        download_root=download_root,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+    )
+
+    logger.info("Whisper 模型加载完成")
+    return model
+
+
 class ASREngine:
     """语音识别引擎"""
 
@@ -32,72 +232,135 @@ class ASREngine:
         whisper_config = config.whisper_config
         models_dir = config.models_dir
 
-        logger.info(f"正在加载 Whisper 模型: {whisper_config['model']}")
-        logger.info(f"设备: {whisper_config['device']}, 计算类型: {whisper_config['compute_type']}")
+        if whisper_config['device'] == 'cpu':
+            logger.warning(
+                "未使用 CUDA 设备，将在 CPU 上运行（速度较慢）。"
+                "如有 NVIDIA 显卡，请安装 CUDA 及 cuDNN 后重试"
+            )
 
-        self.model = WhisperModel(
+        # 模型按配置缓存，重复创建引擎不会重新加载
+        self.model = _get_model(
             whisper_config['model'],
-            device=whisper_config['device'],
-            compute_type=whisper_config['compute_type'],
-            download_root=str(models_dir),
+            whisper_config['device'],
+            whisper_config['compute_type'],
+            str(models_dir),
+            cpu_threads=whisper_config['cpu_threads'],
+            num_workers=whisper_config['num_workers'],
         )
 
         self.language = whisper_config['language']
-        logger.info("Whisper 模型加载完成")
+        # 默认贪心解码：beam_size=1 比 5 快数倍，对口语内容几乎不影响准确率
+        self.beam_size = config.get('whisper.beam_size', 1)
+        self.best_of = config.get('whisper.best_of', 1)
+        self.patience = config.get('whisper.patience', 1.0)
+        self.batch_size = config.get('whisper.batch_size', 8)
+
+        # 批量推理：编码器按 batch_size 个音频块一起计算，长音频吞吐约翻倍
+        # 注意显存占用约随 batch_size 线性增长
+        if BatchedInferencePipeline is not None:
+            self.pipeline = BatchedInferencePipeline(model=self.model)
+        else:
+            self.pipeline = None
+
+        self._cache = None  # 延迟创建
+
+    def _get_cache(self) -> Optional[ASRCache]:
+        """获取识别缓存（cache.enabled=false 时禁用）"""
+        if not config.get('cache.enabled', True):
+            return None
+        if self._cache is None:
+            self._cache = ASRCache(config.models_dir / 'asr_cache.db')
+        return self._cache
 
-    def transcribe_audio(
+    @staticmethod
+    def _load_pcm(audio_file: Path):
+        """
+        将音频解码为 16kHz 单声道 PCM 数组
+
+        Args:
+            audio_file: 音频文件路径
+
+        Returns:
+            np.float32 数组；解码不可用或失败时回退为文件路径字符串
+        """
+        if decode_audio is not None:
+            try:
+                return decode_audio(str(audio_file), sampling_rate=16000)
+            except Exception as e:
+                logger.warning(f"预解码音频失败，回退为文件路径: {e}")
+        return str(audio_file)
+
+    def transcribe_audio_stream(
         self,
         audio_file: Path,
+        jsonl_path: Optional[Path] = None,
         verbose: bool = False
-    ) -> Optional[Dict]:
+    ) -> Iterator[Dict]:
         """
-        识别音频文件
+        流式识别音频文件，逐段产出结果
+
+        相比一次性收集所有分段，流式产出只在内存中保留当前分段，
+        可选地将每段以 JSONL 追加写入磁盘，适合多小时的长音频。
+        识别信息（时长、语言）在迭代开始后可通过 self.last_info 读取。
 
         Args:
             audio_file: 音频文件路径
+            jsonl_path: 分段 JSONL 输出路径（可选）
             verbose: 是否显示详细进度
 
-        Returns:
-            识别结果字典，包含:
-                - text: 完整文本
-                - segments: 分段信息列表
-                - duration: 时长（秒）
+        Yields:
+            分段字典，包含 'start'、'end'、'text'
         """
-        if not audio_file.exists():
-            logger.error(f"音频文件不存在: {audio_file}")
-            return None
+        logger.info(f"正在识别音频: {audio_file}")
+
+        decode_options = {
+            'language': self.language,
+            'beam_size': self.beam_size,
+            'best_of': self.best_of,
+            'patience': self.patience,
+            # 不以前文为条件，避免长音频上的状态依赖减速与内容漂移
+            'condition_on_previous_text': False,
+            # VAD 跳过静音段，长视频可省去大量无效计算
+            'vad_filter': True,
+            'vad_parameters': dict(min_silence_duration_ms=500),
+        }
 
-        try:
-            logger.info(f"正在识别音频: {audio_file}")
+        # 预解码为 16kHz 单声道 PCM 再喂给模型，省去内部再起一次
+        # ffmpeg 子进程，也绕开找不到 ffmpeg 可执行文件的环境问题
+        audio_input = self._load_pcm(audio_file)
 
+        if self.pipeline is not None:
+            segments, info = self.pipeline.transcribe(
+                audio_input,
+                batch_size=self.batch_size,
+                **decode_options,
+            )
+        else:
             segments, info = self.model.transcribe(
-                str(audio_file),
-                language=self.language,
-                beam_size=5,
-                vad_filter=False,  # 禁用 VAD 滤波器
+                audio_input,
+                **decode_options,
             )
 
-            detected_language = info.language
-            language_probability = info.language_probability
+        self.last_info = info
 
-            logger.info(
-                f"检测到语言: {detected_language} "
-                f"(概率: {language_probability:.2f})"
-            )
+        logger.info(
+            f"检测到语言: {info.language} "
+            f"(概率: {info.language_probability:.2f})"
+        )
 
-            # 收集分段信息
-            segments_list = []
-            full_text_parts = []
+        writer = jsonl_path.open('ab') if jsonl_path else None
 
+        try:
             for segment in segments:
                 text = segment.text.strip()
-                segments_list.append({
+                seg = {
                     'start': segment.start,
                     'end': segment.end,
                     'text': text,
-                })
-                if text:  # 只添加非空文本
-                    full_text_parts.append(text)
+                }
+
+                if writer:
+                    writer.write(_dumps_jsonl_line(seg))
 
                 if verbose:
                     logger.debug(
@@ -105,22 +368,81 @@ class ASREngine:
                         f"{segment.text}"
                     )
 
+                yield seg
+        finally:
+            if writer:
+                writer.close()
+
+    def transcribe_audio(
+        self,
+        audio_file: Path,
+        verbose: bool = False
+    ) -> Optional[Dict]:
+        """
+        识别音频文件
+
+        Args:
+            audio_file: 音频文件路径
+            verbose: 是否显示详细进度
+
+        Returns:
+            识别结果字典，包含:
+                - text: 完整文本
+                - segments: 分段信息列表
+                - duration: 时长（秒）
+        """
+        if not audio_file.exists():
+            logger.error(f"音频文件不存在: {audio_file}")
+            return None
+
+        # 同一音频跨运行重复识别时直接命中缓存
+        cache = self._get_cache()
+        fingerprint = None
+        if cache is not None:
+            try:
+                fingerprint = _audio_fingerprint(audio_file)
+                cached = cache.get(fingerprint)
+                if cached is not None:
+                    logger.info(f"命中识别缓存，跳过语音识别: {audio_file}")
+                    return cached
+            except Exception as e:
+                logger.warning(f"读取识别缓存失败: {e}")
+
+        try:
+            # 排空流式生成器，文本用 StringIO 累积，避免再建一份列表
+            segments_list = []
+            text_buf = io.StringIO()
+
+            for seg in self.transcribe_audio_stream(audio_file, verbose=verbose):
+                segments_list.append(seg)
+                if seg['text']:  # 只添加非空文本
+                    if text_buf.tell():
+                        text_buf.write('\n')
+                    text_buf.write(seg['text'])
+
             # 调试信息
             logger.info(f"共识别到 {len(segments_list)} 个分段")
-            if full_text_parts:
-                logger.info(f"文本总长度: {len(''.join(full_text_parts))} 字符")
+            if text_buf.tell():
+                logger.info(f"文本总长度: {text_buf.tell()} 字符")
             else:
                 logger.warning("所有分段文本为空")
 
-            duration = info.duration
+            duration = self.last_info.duration
 
             result = {
-                'text': '\n'.join(full_text_parts),
+                'text': text_buf.getvalue(),
                 'segments': segments_list,
                 'duration': duration,
             }
 
             logger.info(f"识别完成，时长: {duration:.2f}秒")
+
+            if cache is not None and fingerprint:
+                try:
+                    cache.set(fingerprint, result)
+                except Exception as e:
+                    logger.warning(f"写入识别缓存失败: {e}")
+
             return result
 
         except Exception as e:
@@ -139,19 +461,24 @@ class BilibiliAudioExtractor:
         except ImportError:
             raise ImportError("请安装 yt-dlp: pip install yt-dlp")
 
+        self._ffmpeg = _ffmpeg_path()
+
     def extract_audio(
         self,
         video_url: str,
         output_dir: Path,
-        audio_format: str = 'mp3'
+        audio_format: str = 'm4a'
     ) -> Optional[Path]:
         """
         从视频 URL 提取音频
 
+        直接下载最佳音频流（通常是 m4a），不再经 ffmpeg 转码为 MP3：
+        Whisper 内部会自行重采样到 16kHz 单声道，转码纯属浪费且有损。
+
         Args:
             video_url: B站视频 URL
             output_dir: 输出目录
-            audio_format: 音频格式
+            audio_format: 首选音频格式
 
         Returns:
             音频文件路径，提取失败返回 None
@@ -165,53 +492,46 @@ class BilibiliAudioExtractor:
 
         output_template = str(output_dir / f'{bvid}.%(ext)s')
 
-        # 查找 ffmpeg 路径
-        ffmpeg_path = None
-        possible_paths = [
-            r'C:\Users\27970\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_Microsoft.Winget.Source_8wekyb3d8bbwe\ffmpeg-8.0.1-full_build\bin\ffmpeg.exe',
-            r'C:\Users\27970\AppData\Local\Microsoft\WinGet\Links\ffmpeg.exe',
-        ]
-        for path in possible_paths:
-            if Path(path).exists():
-                ffmpeg_path = path
-                break
-
         ydl_opts = {
             'quiet': False,
             'no_warnings': True,
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': audio_format,
-                'preferredquality': '192',
-            }],
+            'format': f'bestaudio[ext={audio_format}]/bestaudio',
             'outtmpl': output_template,
-            'overwrites': True,
+            'overwrites': False,
         }
 
-        if ffmpeg_path:
-            ydl_opts['ffmpeg_location'] = ffmpeg_path
-            logger.info(f"使用 ffmpeg: {ffmpeg_path}")
+        if self._ffmpeg:
+            ydl_opts['ffmpeg_location'] = self._ffmpeg
+            logger.info(f"使用 ffmpeg: {self._ffmpeg}")
 
-        try:
-            logger.info(f"正在提取音频: {video_url}")
+        # 同一 BV 号的并发提取互斥，后到者直接命中已下载的文件
+        with _bvid_lock(bvid):
+            # 已有音频时直接复用，跳过网络下载和重编码
+            if not config.get('processing.force_redownload', False):
+                existing = self._find_audio_file(output_dir, bvid, audio_format)
+                if existing:
+                    logger.info(f"音频已存在，跳过下载: {existing}")
+                    return existing
 
-            with self.yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.extract_info(video_url, download=True)
+            try:
+                logger.info(f"正在提取音频: {video_url}")
 
-            # 查找提取的音频文件
-            audio_file = self._find_audio_file(output_dir, bvid, audio_format)
+                with self.yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    ydl.extract_info(video_url, download=True)
 
-            if audio_file and audio_file.exists():
-                logger.info(f"音频提取成功: {audio_file}")
-                return audio_file
+                # 查找提取的音频文件
+                audio_file = self._find_audio_file(output_dir, bvid, audio_format)
 
-            logger.warning(f"未找到音频文件: {bvid}")
-            return None
+                if audio_file and audio_file.exists():
+                    logger.info(f"音频提取成功: {audio_file}")
+                    return audio_file
 
-        except Exception as e:
-            logger.error(f"提取音频失败: {video_url}, 错误: {e}")
-            return None
+                logger.warning(f"未找到音频文件: {bvid}")
+                return None
+
+            except Exception as e:
+                logger.error(f"提取音频失败: {video_url}, 错误: {e}")
+                return None
 
     def _find_audio_file(
         self,
@@ -235,11 +555,11 @@ class BilibiliAudioExtractor:
         if audio_file.exists():
             return audio_file
 
-        # 搜索所有以 BV 号开头的音频文件
-        for filepath in directory.iterdir():
-            if filepath.is_file() and filepath.stem.startswith(bvid):
-                if filepath.suffix.lower() == f'.{audio_format}':
-                    return filepath
+        # 按 BV 号前缀 glob，避免扫描整个输出目录；
+        # bestaudio 的实际扩展名由源决定，接受任意可识别的音频格式
+        for filepath in directory.glob(f'{bvid}*'):
+            if filepath.is_file() and filepath.suffix.lower() in _AUDIO_EXTENSIONS:
+                return filepath
 
         return None
 
@@ -248,7 +568,8 @@ def transcribe_video(
     video_url: str,
     output_dir: Path,
     asr_engine: ASREngine,
-    keep_audio: bool = False
+    keep_audio: bool = False,
+    audio_file: Optional[Path] = None
 ) -> Optional[Dict]:
     """
     转写视频音频
@@ -258,14 +579,15 @@ def transcribe_video(
         output_dir: 输出目录
         asr_engine: ASR 引擎实例
         keep_audio: 是否保留音频文件
+        audio_file: 已提取的音频文件（可选，跳过提取步骤）
 
     Returns:
         转写结果，转写失败返回 None
     """
-    extractor = BilibiliAudioExtractor()
-
-    # 提取音频
-    audio_file = extractor.extract_audio(video_url, output_dir)
+    # 提取音频（调用方已提取时直接复用）
+    if audio_file is None or not audio_file.exists():
+        extractor = BilibiliAudioExtractor()
+        audio_file = extractor.extract_audio(video_url, output_dir)
 
     if not audio_file:
         return None
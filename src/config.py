@@ -3,11 +3,89 @@
 负责加载和管理应用程序配置
 """
 
+import copy
+import functools
 import json
+import logging
 import os
 from pathlib import Path
 from typing import Dict, Any
 
+try:
+    import ctranslate2
+except ImportError:
+    ctranslate2 = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# 各设备的默认计算类型：GPU 上 int8 权重 + FP16 计算约有 1.5 倍加速
+_DEFAULT_COMPUTE_TYPES = {
+    'cuda': 'int8_float16',
+    'cpu': 'int8',
+}
+
+# 在 CPU 上运行会慢一个数量级以上的大模型
+_LARGE_MODELS = {'large', 'large-v1', 'large-v2', 'large-v3', 'large-v3-turbo'}
+
+
+@functools.lru_cache(maxsize=128)
+def _split_key(key: str) -> tuple:
+    """
+    拆分点号分隔的配置键，结果带缓存
+
+    配置键的取值是固定的少数几十个，缓存后热路径上的 get()
+    不再每次执行 str.split。
+
+    Args:
+        key: 配置键，如 "whisper.model"
+
+    Returns:
+        键路径元组，如 ("whisper", "model")
+    """
+    return tuple(key.split('.'))
+
+
+@functools.lru_cache(maxsize=8)
+def _read_config_file(path_str: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    解析配置文件，按 (路径, 修改时间) 缓存
+
+    同一配置文件在未修改时只解析一次，重复构造 Config 不再
+    反复解析 JSON；文件被修改后 mtime 变化，缓存自动失效。
+
+    Args:
+        path_str: 配置文件路径
+        mtime_ns: 文件修改时间（纳秒）
+
+    Returns:
+        解析后的配置字典
+    """
+    data = Path(path_str).read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _detect_device() -> str:
+    """
+    探测可用的计算设备
+
+    Returns:
+        'cuda' 如果检测到可用的 CUDA 设备，否则 'cpu'
+    """
+    if ctranslate2 is not None:
+        try:
+            if ctranslate2.get_cuda_device_count() > 0:
+                return 'cuda'
+        except Exception:
+            pass
+    return 'cpu'
+
 
 class Config:
     """配置管理类"""
@@ -27,8 +105,9 @@ class Config:
         if not self.config_path.exists():
             return {}
 
-        with open(self.config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        mtime_ns = self.config_path.stat().st_mtime_ns
+        # 深拷贝使各 Config 实例互不影响（set() 不会污染缓存）
+        return copy.deepcopy(_read_config_file(str(self.config_path), mtime_ns))
 
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -41,7 +120,7 @@ class Config:
         Returns:
             配置值
         """
-        keys = key.split('.')
+        keys = _split_key(key)
         value = self.config
 
         for k in keys:
@@ -60,7 +139,7 @@ class Config:
             key: 配置键，支持点号分隔的嵌套键
             value: 配置值
         """
-        keys = key.split('.')
+        keys = _split_key(key)
         config = self.config
 
         for k in keys[:-1]:
@@ -71,9 +150,23 @@ class Config:
         config[keys[-1]] = value
 
     def save(self):
-        """保存配置到文件"""
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
+        """保存配置到文件
+
+        先写临时文件再原子替换，写入中断不会损坏原有的 config.json。
+        """
+        tmp_path = self.config_path.with_suffix('.json.tmp')
+
+        if orjson is not None:
+            tmp_path.write_bytes(
+                orjson.dumps(self.config, option=orjson.OPT_INDENT_2)
+            )
+        else:
+            tmp_path.write_text(
+                json.dumps(self.config, indent=2, ensure_ascii=False),
+                encoding='utf-8',
+            )
+
+        os.replace(tmp_path, self.config_path)
 
     @property
     def output_dir(self) -> Path:
@@ -95,12 +188,43 @@ class Config:
 
     @property
     def whisper_config(self) -> Dict[str, Any]:
-        """获取 Whisper 配置"""
+        """获取 Whisper 配置（未显式配置时自动探测设备）"""
+        # 显式配置优先，否则自动探测 CUDA
+        device = self.get('whisper.device') or _detect_device()
+        compute_type = (
+            self.get('whisper.compute_type')
+            or _DEFAULT_COMPUTE_TYPES.get(device, 'int8')
+        )
+
+        # 未显式配置模型时按设备选择：GPU 上 large-v3-turbo（解码层更少，
+        # 速度约为 large-v3 两倍，需约 6GB 显存），CPU 上 small
+        model = self.get('whisper.model') or (
+            'large-v3-turbo' if device == 'cuda' else 'small'
+        )
+
+        # large 系列在 CPU 上慢 25 倍以上，除非显式允许否则降级，
+        # 避免用户无意中跑进极慢配置
+        if (device == 'cpu'
+                and model in _LARGE_MODELS
+                and not self.get('whisper.allow_cpu_large', False)):
+            logger.warning(
+                f"模型 {model} 在 CPU 上运行极慢，已自动降级为 small。"
+                "如确需在 CPU 上使用大模型，请设置 whisper.allow_cpu_large=true；"
+                "推荐安装 CUDA/cuDNN 以启用 GPU 加速"
+            )
+            model = 'small'
+
+        # cpu_threads 固定为物理核数的近似值，num_workers>1 允许
+        # 并发 transcribe 调用复用同一模型（显存约随之线性增长）
+        default_cpu_threads = max(1, (os.cpu_count() or 2) // 2)
+
         return {
-            'model': self.get('whisper.model', 'base'),
-            'device': self.get('whisper.device', 'cpu'),
-            'compute_type': self.get('whisper.compute_type', 'int8'),
+            'model': model,
+            'device': device,
+            'compute_type': compute_type,
             'language': self.get('whisper.language', 'zh'),
+            'cpu_threads': self.get('whisper.cpu_threads', default_cpu_threads),
+            'num_workers': self.get('whisper.num_workers', 2),
         }
 
     @property
@@ -4,18 +4,22 @@ VTW GUI - Bilibili 视频转文字工具图形界面
 基于 Tkinter 构建
 """
 
-import sys
+import queue
 import threading
 import time
 import tkinter as tk
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 from pathlib import Path
 
-# 添加 src 目录到路径
-sys.path.insert(0, str(Path(__file__).parent))
-
-from config import config
-from vtw import VideoProcessor, main as vtw_main
+try:  # 包方式运行（python -m src.gui）
+    from .config import config
+    from .vtw import VideoProcessor, main as vtw_main
+except ImportError:  # 脚本方式运行（python src/gui.py），src 目录即 sys.path[0]
+    from config import config
+    from vtw import VideoProcessor, main as vtw_main
 import argparse
 
 
@@ -31,9 +35,29 @@ class VTWGUI:
         # 视频处理器
         self.processor = VideoProcessor()
 
+        # 日志与进度由工作线程写入队列，主线程定时批量刷新
+        # （Tk 只允许主线程更新界面）
+        self._log_q = queue.Queue()
+        self._progress_state = None
+        self._max_log_lines = config.get('gui.max_log_lines', 2000)
+
+        # URL 变化防抖与预估结果缓存
+        self._debounce_id = None
+        self._estimate_cache = {}
+
         # 创建 UI
         self.create_widgets()
 
+        # 启动界面刷新泵
+        self.root.after(50, self._drain_log_queue)
+
+        # 显示当前使用的模型配置
+        whisper_config = config.whisper_config
+        self.log(
+            f"Whisper 模型: {whisper_config['model']} "
+            f"({whisper_config['device']}, {whisper_config['compute_type']})"
+        )
+
         # 绑定关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
@@ -223,15 +247,27 @@ class VTWGUI:
             self.log(f"输出目录已更改为: {selected_dir}")
 
     def _on_url_changed(self, *args):
-        """URL 变化时计算预估时间"""
+        """URL 变化时计算预估时间（防抖，粘贴长 URL 不会逐键触发）"""
+        if self._debounce_id is not None:
+            self.root.after_cancel(self._debounce_id)
+        self._debounce_id = self.root.after(250, self._recompute_estimate)
+
+    def _recompute_estimate(self):
+        """防抖到期后重新计算预估时间"""
+        self._debounce_id = None
         url = self.url_var.get().strip()
-        if url:
-            # 简单估算（基于经验值）
-            # 单个视频：无字幕约 15-20 分钟，有字幕 < 1 分钟
-            # UP 主：每个视频 1-2 分钟
+        if not url:
+            return
 
+        # 简单估算（基于经验值）
+        # 单个视频：无字幕约 15-20 分钟，有字幕 < 1 分钟
+        # UP 主：每个视频 1-2 分钟
+        time_str = self._estimate_cache.get(url)
+        if time_str is None:
             time_str = self._estimate_time(url)
-            self.estimated_time_var.set(time_str)
+            self._estimate_cache[url] = time_str
+
+        self.estimated_time_var.set(time_str)
 
     def _estimate_time(self, url):
         """估算处理时间"""
@@ -275,16 +311,44 @@ class VTWGUI:
         self.log("日志已清空")
 
     def log(self, message):
-        """添加日志信息"""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """添加日志信息（线程安全，实际刷新由主线程泵完成）"""
+        self._log_q.put(str(message))
 
     def update_progress(self, value, status):
-        """更新进度"""
-        self.progress_var.set(value)
-        self.status_var.set(status)
-        self.root.update_idletasks()
+        """更新进度（线程安全，实际刷新由主线程泵完成）"""
+        self._progress_state = (value, status)
+
+    def _drain_log_queue(self):
+        """主线程定时泵：批量刷新日志与进度
+
+        每次最多取 200 条日志合并成一次 insert，避免逐行插入
+        触发的逐次重绘；随后把自己重新排入事件循环。
+        """
+        batch = []
+        try:
+            while len(batch) < 200:
+                batch.append(self._log_q.get_nowait())
+        except queue.Empty:
+            pass
+
+        if batch:
+            self.log_text.insert(tk.END, '\n'.join(batch) + '\n')
+
+            # 裁剪最旧的日志，保持 Text 内部行数有界，插入开销不随时间增长
+            line_count = int(self.log_text.index('end-1c').split('.')[0])
+            if line_count > self._max_log_lines:
+                self.log_text.delete('1.0', f'{line_count - self._max_log_lines + 1}.0')
+
+            self.log_text.see(tk.END)
+
+        state = self._progress_state
+        if state is not None:
+            self._progress_state = None
+            value, status = state
+            self.progress_var.set(value)
+            self.status_var.set(status)
+
+        self.root.after(50, self._drain_log_queue)
 
     def start_processing(self):
         """开始处理"""
@@ -342,7 +406,10 @@ class VTWGUI:
             # 使用 VideoProcessor 处理
             self.update_progress(30, "正在下载视频信息...")
 
-            from subtitle import SubtitleDownloader
+            try:  # 包方式运行（python -m src.gui）
+                from .subtitle import SubtitleDownloader
+            except ImportError:  # 脚本方式运行（python src/gui.py）
+                from subtitle import SubtitleDownloader
             downloader = SubtitleDownloader()
 
             # 判断是 UP 主还是单个视频
@@ -376,7 +443,10 @@ class VTWGUI:
                 self.update_progress(40, "正在获取 UP 主视频列表...")
 
                 # 检查 URL 格式是否有效
-                from utils import extract_uid
+                try:  # 包方式运行（python -m src.gui）
+                    from .utils import extract_uid
+                except ImportError:  # 脚本方式运行（python src/gui.py）
+                    from utils import extract_uid
                 uid = extract_uid(url)
                 if not uid:
                     self.log("错误: 无法解析 UP 主 URL")
@@ -396,7 +466,10 @@ class VTWGUI:
 
                 self.log(f"已解析 UP 主 UID: {uid}")
 
-                from subtitle import get_up_videos
+                try:  # 包方式运行（python -m src.gui）
+                    from .subtitle import get_up_videos
+                except ImportError:  # 脚本方式运行（python src/gui.py）
+                    from subtitle import get_up_videos
                 videos = get_up_videos(url, args.limit if hasattr(args, 'limit') else None)
 
                 if not videos:
@@ -431,13 +504,17 @@ class VTWGUI:
 
                 # 批量处理
                 total = len(videos)
-                for idx, video in enumerate(videos, 1):
-                    progress = 40 + (60 * idx // total)
-                    self.update_progress(progress, f"正在处理 [{idx}/{total}] {video.get('title', '')}")
+                if self.asr_var.get() and total > 1:
+                    # 强制语音识别：提取与识别流水线并行
+                    self._process_batch_asr(videos)
+                else:
+                    for idx, video in enumerate(videos, 1):
+                        progress = 40 + (60 * idx // total)
+                        self.update_progress(progress, f"正在处理 [{idx}/{total}] {video.get('title', '')}")
 
-                    result = self.processor.process_video(video, self.asr_var.get())
-                    if not result:
-                        self.log(f"警告: 视频处理失败 - {video.get('title', '')}")
+                        result = self.processor.process_video(video, self.asr_var.get())
+                        if not result:
+                            self.log(f"警告: 视频处理失败 - {video.get('title', '')}")
 
                 self.update_progress(100, "批量处理完成！")
                 self.log("=" * 50)
@@ -449,6 +526,70 @@ class VTWGUI:
         finally:
             self._finish_processing()
 
+    def _process_batch_asr(self, videos):
+        """
+        批量语音识别：音频提取与识别流水线并行
+
+        音频提取是网络 I/O，语音识别是计算密集，两个阶段重叠执行
+        可以在下载下一个视频的音频时让 GPU/CPU 继续识别当前视频。
+        提取线程池由 processing.max_workers 控制，识别端保持单消费者
+        共享一个引擎；队列限长提供背压，避免预取占满磁盘。
+        """
+        try:  # 包方式运行（python -m src.gui）
+            from .asr import BilibiliAudioExtractor
+        except ImportError:  # 脚本方式运行（python src/gui.py）
+            from asr import BilibiliAudioExtractor
+
+        total = len(videos)
+        output_dir = config.output_dir
+        extractor = BilibiliAudioExtractor()
+        audio_q = queue.Queue(maxsize=2)
+        workers = max(1, config.max_workers)
+
+        def _producer():
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as ex:
+                    # 滑动窗口式惰性提交：在途提取最多 worker 数 + 队列深度。
+                    # audio_q.put 满时阻塞，识别端消费慢则窗口停止前进，
+                    # 落盘的待识别音频数量有上界
+                    window = workers + audio_q.maxsize
+                    it = iter(videos)
+                    pending = deque(
+                        (v, ex.submit(extractor.extract_audio, v['url'], output_dir))
+                        for v in islice(it, window)
+                    )
+                    while pending:
+                        video, fut = pending.popleft()
+                        try:
+                            audio_file = fut.result()
+                        except Exception as e:
+                            self.log(f"警告: 音频提取失败 - {video.get('title', '')}: {e}")
+                            audio_file = None
+                        audio_q.put((video, audio_file))
+                        for v in islice(it, 1):
+                            pending.append(
+                                (v, ex.submit(extractor.extract_audio, v['url'], output_dir))
+                            )
+            finally:
+                audio_q.put(None)  # 结束标记
+
+        threading.Thread(target=_producer, daemon=True).start()
+
+        idx = 0
+        while True:
+            item = audio_q.get()
+            if item is None:
+                break
+
+            idx += 1
+            video, audio_file = item
+            progress = 40 + (60 * idx // total)
+            self.update_progress(progress, f"正在处理 [{idx}/{total}] {video.get('title', '')}")
+
+            result = self.processor.process_video(video, True, audio_file=audio_file)
+            if not result:
+                self.log(f"警告: 视频处理失败 - {video.get('title', '')}")
+
     def stop_processing(self):
         """停止处理"""
         self.log("用户请求停止处理...")
@@ -3,29 +3,211 @@
 负责从 B站下载和解析字幕
 """
 
+import asyncio
 import json
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.cookiejar import MozillaCookieJar
 from pathlib import Path
 from typing import Optional, List, Dict
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 try:
     import yt_dlp
 except ImportError:
     yt_dlp = None
 
-from config import config
-from utils import extract_bvid, merge_subtitles, retry_on_failure
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # 包方式运行（python -m src.vtw）
+    from .config import config
+    from .utils import (
+        extract_bvid,
+        extract_uid,
+        merge_subtitles,
+        parse_subtitles,
+        retry_on_failure,
+        _parse_json_subtitle,
+    )
+except ImportError:  # 脚本方式运行（python src/vtw.py）
+    from config import config
+    from utils import (
+        extract_bvid,
+        extract_uid,
+        merge_subtitles,
+        parse_subtitles,
+        retry_on_failure,
+        _parse_json_subtitle,
+    )
 
 logger = logging.getLogger(__name__)
 
+_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+
+class _BiliApiClient:
+    """B站 API 客户端
+
+    直接调用官方 HTTP API 获取视频信息和 CC 字幕，只做一次网络请求
+    加少量 JSON 解析，绕开 yt-dlp 每次调用数百毫秒的完整提取器；
+    Session 复用 TCP/TLS 连接，批量调用免去重复握手。
+    """
+
+    API_BASE = 'https://api.bilibili.com'
+
+    def __init__(self):
+        """初始化客户端"""
+        if requests is None:
+            raise ImportError("请安装 requests: pip install requests")
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': _USER_AGENT,
+            'Referer': 'https://www.bilibili.com',
+        })
+
+        # cookies 配置支持两种形式：Cookie 头字符串，或 Netscape 格式的
+        # cookie 文件（与 yt-dlp 的 cookiefile 同款）。未带上配置的凭证时
+        # B站对部分视频会返回空字幕列表，因此记录凭证是否真正生效，
+        # 供 download_subtitle 决定空结果是否可信
+        self.has_credentials = False
+        cookies = config.bilibili_cookies
+        if cookies:
+            if Path(cookies).exists():
+                try:
+                    jar = MozillaCookieJar(str(cookies))
+                    jar.load(ignore_discard=True, ignore_expires=True)
+                    self.session.cookies.update(jar)
+                    self.has_credentials = True
+                except Exception as e:
+                    logger.warning(f"加载 cookies 文件失败: {e}")
+            else:
+                self.session.headers['Cookie'] = cookies
+                self.has_credentials = True
+
+        self.timeout = config.get('bilibili.timeout', 30)
+
+    def _get_json(self, path: str, params: Dict) -> Optional[Dict]:
+        """GET 接口并返回 data 字段，业务 code 非 0 时返回 None"""
+        response = self.session.get(
+            f'{self.API_BASE}{path}',
+            params=params,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        # orjson 直接解析字节，比 response.json() 走 stdlib 快 3-5 倍
+        if orjson is not None:
+            payload = orjson.loads(response.content)
+        else:
+            payload = response.json()
+
+        if payload.get('code') != 0:
+            logger.debug(f"B站 API 返回错误: {path} code={payload.get('code')}")
+            return None
+
+        return payload.get('data')
+
+    def get_video_info(self, bvid: str) -> Optional[Dict]:
+        """获取视频信息（/x/web-interface/view）"""
+        data = self._get_json('/x/web-interface/view', {'bvid': bvid})
+        if not data:
+            return None
+
+        pubdate = data.get('pubdate', 0)
+        upload_date = (
+            time.strftime('%Y%m%d', time.localtime(pubdate)) if pubdate else ''
+        )
+
+        return {
+            'id': data.get('bvid', bvid),
+            'title': data.get('title', ''),
+            'description': data.get('desc', ''),
+            'upload_date': upload_date,
+            'duration': data.get('duration', 0),
+            'url': f"https://www.bilibili.com/video/{data.get('bvid', bvid)}",
+        }
+
+    def get_cid(self, bvid: str) -> Optional[int]:
+        """获取视频第一个分 P 的 cid（/x/player/pagelist）"""
+        data = self._get_json('/x/player/pagelist', {'bvid': bvid})
+        if not data:
+            return None
+        return data[0].get('cid')
+
+    def get_subtitle_text(self, bvid: str) -> Optional[str]:
+        """
+        下载并解析 CC 字幕为纯文本
+
+        Args:
+            bvid: 视频 BV 号
+
+        Returns:
+            字幕文本；视频无 CC 字幕时返回 None
+        """
+        cid = self.get_cid(bvid)
+        if not cid:
+            return None
+
+        data = self._get_json('/x/player/v2', {'bvid': bvid, 'cid': cid})
+        if not data:
+            return None
+
+        subtitles = (data.get('subtitle') or {}).get('subtitles') or []
+        if not subtitles:
+            return None
+
+        subtitle_url = subtitles[0].get('subtitle_url', '')
+        if not subtitle_url:
+            return None
+        if subtitle_url.startswith('//'):
+            subtitle_url = 'https:' + subtitle_url
+
+        response = self.session.get(subtitle_url, timeout=self.timeout)
+        response.raise_for_status()
+
+        parsed = _parse_json_subtitle(response.content)
+        if not parsed:
+            return None
+
+        return merge_subtitles(parsed)
+
 
 class SubtitleDownloader:
     """字幕下载器"""
 
     def __init__(self):
         """初始化字幕下载器"""
-        if yt_dlp is None:
-            raise ImportError("请安装 yt-dlp: pip install yt-dlp")
+        if yt_dlp is None and requests is None:
+            raise ImportError(
+                "请安装 requests 或 yt-dlp: pip install requests yt-dlp"
+            )
+
+        # 直连 API 客户端（requests 不可用时退回 yt-dlp）
+        self._api_client = None
+        if requests is not None:
+            try:
+                self._api_client = _BiliApiClient()
+            except Exception:
+                self._api_client = None
 
         self.ydl_opts = {
             'quiet': False,
@@ -43,10 +225,21 @@ class SubtitleDownloader:
         if cookies:
             self.ydl_opts['cookiefile'] = cookies
 
+        # 共享的 yt-dlp 实例（延迟创建）：每次 with YoutubeDL(...) 都会
+        # 重建选项、cookiejar 并丢弃 HTTP 连接，复用实例省去每个视频
+        # 一次 TLS 握手
+        self._ydl = None
+        self._info_ydl = None
+        # yt-dlp 实例共享可变的 outtmpl，回退路径串行执行保证线程安全
+        self._ydl_lock = threading.Lock()
+
     def download_subtitle(self, video_url: str, output_dir: Path) -> Optional[str]:
         """
         下载单个视频的字幕
 
+        优先直连 B站 API（一次网络请求），出错时回退 yt-dlp；
+        设置 bilibili.use_yt_dlp=true 可强制走旧的 yt-dlp 路径。
+
         Args:
             video_url: B站视频 URL
             output_dir: 输出目录
@@ -54,44 +247,122 @@ class SubtitleDownloader:
         Returns:
             字幕文本，如果下载失败返回 None
         """
-        try:
-            bvid = extract_bvid(video_url)
-            if not bvid:
-                logger.warning(f"无法提取 BV 号: {video_url}")
-                return None
-
-            # 尝试下载字幕
-            self.ydl_opts['outtmpl'] = str(output_dir / f'{bvid}.%(ext)s')
+        bvid = extract_bvid(video_url)
+        if not bvid:
+            logger.warning(f"无法提取 BV 号: {video_url}")
+            return None
 
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=True)
+        use_yt_dlp = config.get('bilibili.use_yt_dlp', False)
 
-                if not info:
-                    logger.warning(f"无法获取视频信息: {video_url}")
+        if self._api_client is not None and not use_yt_dlp:
+            try:
+                text = self._api_client.get_subtitle_text(bvid)
+                if text:
+                    logger.info(f"字幕下载成功（B站 API）: {bvid}")
+                    return text
+                # API 正常响应但无 CC 字幕：只有请求确实带上了配置的
+                # 凭证（或本就没有配置凭证）才视为权威结果；凭证未生效
+                # 时 B站可能对匿名请求隐藏字幕，交给 yt-dlp 再试一次
+                if self._api_client.has_credentials or not config.bilibili_cookies:
+                    logger.info(f"视频无可用字幕: {video_url}")
                     return None
+                logger.info("API 请求未携带配置的 cookies，回退 yt-dlp 重试字幕")
+            except Exception as e:
+                logger.warning(f"B站 API 获取字幕失败，回退 yt-dlp: {e}")
+
+        return self._download_subtitle_ytdlp(bvid, video_url, output_dir)
+
+    def download_subtitles_batch(
+        self,
+        urls: List[str],
+        output_dir: Path,
+        max_workers: int = 8
+    ) -> Dict[str, Optional[str]]:
+        """
+        并发下载多个视频的字幕
 
-                # 检查是否有字幕
-                subtitles = info.get('subtitles', {})
-                automatic_captions = info.get('automatic_captions', {})
+        字幕获取是网络 I/O，socket 读取时释放 GIL，线程池扇出后
+        吞吐量近似线性提升，直到触达服务端的单 IP 限流。
 
-                if not subtitles and not automatic_captions:
-                    logger.info(f"视频无可用字幕: {video_url}")
-                    return None
+        Args:
+            urls: 视频 URL 列表
+            output_dir: 输出目录
+            max_workers: 最大并发数
+
+        Returns:
+            {url: 字幕文本}，下载失败的条目为 None
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.download_subtitle, url, output_dir): url
+                for url in urls
+            }
+            return {futures[f]: f.result() for f in as_completed(futures)}
+
+    def _download_subtitle_ytdlp(
+        self,
+        bvid: str,
+        video_url: str,
+        output_dir: Path
+    ) -> Optional[str]:
+        """通过 yt-dlp 下载字幕（兼容回退路径）"""
+        if yt_dlp is None:
+            logger.warning("yt-dlp 未安装，无法回退下载字幕")
+            return None
+
+        try:
+            with self._ydl_lock:
+                if self._ydl is None:
+                    self._ydl = yt_dlp.YoutubeDL(self.ydl_opts)
+
+                # 只更新输出模板，复用实例和连接
+                self._ydl.params['outtmpl'] = str(output_dir / f'{bvid}.%(ext)s')
 
-                # 查找下载的字幕文件
-                subtitle_file = self._find_subtitle_file(output_dir, bvid)
+                info = self._ydl.extract_info(video_url, download=True)
 
-                if subtitle_file and subtitle_file.exists():
-                    logger.info(f"字幕下载成功: {subtitle_file}")
-                    return self._parse_subtitle_to_text(subtitle_file)
+            if not info:
+                logger.warning(f"无法获取视频信息: {video_url}")
+                return None
 
-                logger.warning(f"未找到字幕文件: {bvid}")
+            # 检查是否有字幕
+            subtitles = info.get('subtitles', {})
+            automatic_captions = info.get('automatic_captions', {})
+
+            if not subtitles and not automatic_captions:
+                logger.info(f"视频无可用字幕: {video_url}")
                 return None
 
+            # 查找下载的字幕文件
+            subtitle_file = self._find_subtitle_file(output_dir, bvid)
+
+            if subtitle_file and subtitle_file.exists():
+                logger.info(f"字幕下载成功: {subtitle_file}")
+                return self._parse_subtitle_to_text(subtitle_file)
+
+            logger.warning(f"未找到字幕文件: {bvid}")
+            return None
+
         except Exception as e:
             logger.error(f"下载字幕失败: {video_url}, 错误: {e}")
             return None
 
+    def close(self):
+        """释放共享的 yt-dlp 实例与 HTTP 会话"""
+        if self._ydl is not None:
+            self._ydl.close()
+            self._ydl = None
+        if self._info_ydl is not None:
+            self._info_ydl.close()
+            self._info_ydl = None
+        if self._api_client is not None:
+            self._api_client.session.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
     def _find_subtitle_file(self, directory: Path, bvid: str) -> Optional[Path]:
         """
         查找字幕文件
@@ -104,27 +375,37 @@ class SubtitleDownloader:
             字幕文件路径，如果未找到返回 None
         """
         # 常见的字幕文件扩展名
-        subtitle_extensions = ['.ass', '.srt', '.json', '.vtt']
+        subtitle_extensions = ('.ass', '.srt', '.json', '.vtt')
+
+        # 一次目录枚举建立文件名集合，代替逐模式 exists() 的 stat 风暴
+        with os.scandir(directory) as it:
+            names = {
+                entry.name
+                for entry in it
+                if entry.is_file(follow_symlinks=False)
+            }
 
         for ext in subtitle_extensions:
             # 尝试各种可能的文件名模式
-            patterns = [
+            patterns = (
                 f"{bvid}{ext}",
                 f"{bvid}.zh-Hans{ext}",
                 f"{bvid}.zh-CN{ext}",
                 f"{bvid}.zh{ext}",
-            ]
+            )
 
             for pattern in patterns:
-                filepath = directory / pattern
-                if filepath.exists():
-                    return filepath
-
-        # 搜索所有以 BV 号开头的字幕文件
-        for filepath in directory.iterdir():
-            if filepath.is_file() and filepath.stem.startswith(bvid):
-                if filepath.suffix.lower() in subtitle_extensions:
-                    return filepath
+                if pattern in names:
+                    return directory / pattern
+
+        # 搜索所有以 BV 号开头的字幕文件：先做前缀判断快速跳过，
+        # 再用 rfind 取扩展名，避免逐项构造 Path 对象
+        for name in names:
+            if not name.startswith(bvid):
+                continue
+            dot = name.rfind('.')
+            if dot >= 0 and name[dot:].lower() in subtitle_extensions:
+                return directory / name
 
         return None
 
@@ -138,8 +419,6 @@ class SubtitleDownloader:
         Returns:
             字幕文本，如果解析失败返回 None
         """
-        from utils import parse_subtitles, merge_subtitles
-
         try:
             subtitles = parse_subtitles(subtitle_file)
             if not subtitles:
@@ -174,27 +453,150 @@ class SubtitleDownloader:
                 - duration: 时长（秒）
                 - url: 视频链接
         """
+        bvid = extract_bvid(video_url)
+        use_yt_dlp = config.get('bilibili.use_yt_dlp', False)
+
+        # 优先直连 B站 API，一次 GET 即可拿到全部字段
+        if bvid and self._api_client is not None and not use_yt_dlp:
+            try:
+                info = self._api_client.get_video_info(bvid)
+                if info:
+                    return info
+            except Exception as e:
+                logger.warning(f"B站 API 获取视频信息失败，回退 yt-dlp: {e}")
+
+        if yt_dlp is None:
+            logger.warning("yt-dlp 未安装，无法回退获取视频信息")
+            return None
+
         try:
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                info = ydl.extract_info(video_url, download=False)
+            if self._info_ydl is None:
+                self._info_ydl = yt_dlp.YoutubeDL({'quiet': True})
 
-                if not info:
-                    return None
+            info = self._info_ydl.extract_info(video_url, download=False)
 
-                return {
-                    'id': info.get('id', ''),
-                    'title': info.get('title', ''),
-                    'description': info.get('description', ''),
-                    'upload_date': info.get('upload_date', ''),
-                    'duration': info.get('duration', 0),
-                    'url': f"https://www.bilibili.com/video/{info.get('id', '')}",
-                }
+            if not info:
+                return None
+
+            return {
+                'id': info.get('id', ''),
+                'title': info.get('title', ''),
+                'description': info.get('description', ''),
+                'upload_date': info.get('upload_date', ''),
+                'duration': info.get('duration', 0),
+                'url': f"https://www.bilibili.com/video/{info.get('id', '')}",
+            }
 
         except Exception as e:
             logger.error(f"获取视频信息失败: {video_url}, 错误: {e}")
             return None
 
 
+def _length_to_seconds(length) -> int:
+    """将 "MM:SS" / "HH:MM:SS" 形式的时长转换为秒"""
+    parts = str(length).split(':')
+    try:
+        nums = [int(p) for p in parts]
+    except ValueError:
+        return 0
+
+    seconds = 0
+    for n in nums:
+        seconds = seconds * 60 + n
+    return seconds
+
+
+async def _fetch_up_videos_async(uid: str, limit: Optional[int]) -> List[Dict]:
+    """
+    并发分页获取 UP 主视频列表
+
+    先取第 1 页得到总数，其余页并发请求（信号量限制并发 5），
+    收到 429 时按 Retry-After 等待后重试。相比逐页串行请求，
+    大频道的耗时从 O(页数 × RTT) 降到 O(RTT)。
+
+    Args:
+        uid: UP 主 UID
+        limit: 最多获取多少个视频
+
+    Returns:
+        视频信息列表
+    """
+    api_url = 'https://api.bilibili.com/x/space/arc/search'
+    page_size = 30
+
+    headers = {
+        'User-Agent': _USER_AGENT,
+        'Referer': f'https://space.bilibili.com/{uid}',
+    }
+    cookies = config.bilibili_cookies
+    if cookies and not Path(cookies).exists():
+        headers['Cookie'] = cookies
+
+    semaphore = asyncio.Semaphore(5)
+    timeout = aiohttp.ClientTimeout(total=config.get('bilibili.timeout', 30))
+
+    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+
+        async def _fetch_page(pn: int) -> Dict:
+            params = {'mid': uid, 'ps': page_size, 'pn': pn, 'order': 'pubdate'}
+            async with semaphore:
+                for attempt in range(3):
+                    async with session.get(api_url, params=params) as resp:
+                        if resp.status == 429:
+                            retry_after = float(resp.headers.get('Retry-After', 1))
+                            await asyncio.sleep(retry_after)
+                            continue
+                        resp.raise_for_status()
+                        payload = await resp.json()
+
+                    if payload.get('code') != 0:
+                        raise RuntimeError(f"B站 API 返回错误: code={payload.get('code')}")
+                    return payload['data']
+
+                raise RuntimeError("请求被限流，重试次数耗尽")
+
+        first = await _fetch_page(1)
+        count = first.get('page', {}).get('count', 0)
+        if limit:
+            count = min(count, limit)
+
+        total_pages = max(1, -(-count // page_size))
+        rest = await asyncio.gather(
+            *[_fetch_page(pn) for pn in range(2, total_pages + 1)]
+        )
+
+        videos = []
+        for data in (first, *rest):
+            for item in data.get('list', {}).get('vlist', []):
+                bvid = item.get('bvid', '')
+                created = item.get('created', 0)
+                videos.append({
+                    'id': bvid,
+                    'title': item.get('title') or '未命名',
+                    'url': f"https://www.bilibili.com/video/{bvid}",
+                    'description': item.get('description', ''),
+                    'upload_date': (
+                        time.strftime('%Y%m%d', time.localtime(created))
+                        if created else ''
+                    ),
+                    'duration': _length_to_seconds(item.get('length', 0)),
+                })
+
+        return videos[:limit] if limit else videos
+
+
+def _fetch_up_videos_api(uid: str, limit: Optional[int]) -> Optional[List[Dict]]:
+    """通过 B站 API 获取 UP 主视频列表，不可用时返回 None（回退 yt-dlp）"""
+    if aiohttp is None:
+        return None
+
+    try:
+        return asyncio.run(_fetch_up_videos_async(uid, limit))
+    except Exception as e:
+        logger.warning(f"B站 API 获取视频列表失败，回退 yt-dlp: {e}")
+        return None
+
+
 def get_up_videos(up_url: str, limit: Optional[int] = None) -> List[Dict]:
     """
     获取 UP 主的视频列表
@@ -206,8 +608,6 @@ def get_up_videos(up_url: str, limit: Optional[int] = None) -> List[Dict]:
     Returns:
         视频信息列表
     """
-    from utils import extract_uid
-
     uid = extract_uid(up_url)
     if not uid:
         logger.error(f"无法从 URL 中提取 UID: {up_url}")
@@ -218,6 +618,13 @@ def get_up_videos(up_url: str, limit: Optional[int] = None) -> List[Dict]:
 
     logger.info(f"正在获取 UP 主视频列表: {up_url} (UID: {uid})")
 
+    # 优先直连 B站 API 并发分页获取
+    if not config.get('bilibili.use_yt_dlp', False):
+        api_videos = _fetch_up_videos_api(uid, limit)
+        if api_videos is not None:
+            logger.info(f"共获取到 {len(api_videos)} 个视频")
+            return api_videos
+
     videos = []
 
     try:
@@ -228,7 +635,9 @@ def get_up_videos(up_url: str, limit: Optional[int] = None) -> List[Dict]:
         ydl_opts = {
             'quiet': True,
             'no_warnings': True,
-            'extract_flat': False,  # 获取完整信息以获得标题
+            # 扁平模式直接从频道页拿 title/id/url，
+            # 避免对每个视频各跑一次完整提取器
+            'extract_flat': 'in_playlist',
             'ignoreerrors': True,
             'download': False,
             # 添加用户代理
@@ -265,11 +674,7 @@ def get_up_videos(up_url: str, limit: Optional[int] = None) -> List[Dict]:
                 if entry is None:
                     continue
 
-                # 尝试从多个字段获取标题
-                title = (entry.get('title') or
-                         entry.get('alt_title') or
-                         entry.get('fulltitle') or
-                         '未命名')
+                title = entry.get('title') or '未命名'
 
                 videos.append({
                     'id': entry.get('id'),
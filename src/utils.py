@@ -5,15 +5,53 @@
 
 import re
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Iterable, Iterator, Optional, Dict, List
 from urllib.parse import urlparse
 
 try:
-    import opencc
-    OPENCC_AVAILABLE = True
+    import orjson
+    _json_loads = orjson.loads
 except ImportError:
-    OPENCC_AVAILABLE = False
+    from json import loads as _json_loads
+
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+# 懒加载的共享 Session，对 api.bilibili.com 复用 TCP/TLS 连接
+_BILI_SESSION = None
+
+
+def _get_bili_session():
+    """获取模块级共享的 requests.Session（带连接池和公共请求头）"""
+    global _BILI_SESSION
+    if _BILI_SESSION is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Referer': 'https://www.bilibili.com',
+        })
+        _BILI_SESSION = session
+    return _BILI_SESSION
+
+# 模块级预编译正则，热路径上不再重复经过 re 内部缓存查找
+_BVID_RE = re.compile(r'BV[a-zA-Z0-9]{10}')
+_UID_SPACE_RE = re.compile(r'space\.bilibili\.com/(\d+)')
+_UID_AT_RE = re.compile(r'space\.bilibili\.com/@([^/]+)')
+_UID_TRAIL_RE = re.compile(r'/(\d+)$')
+# 文件名清理转换表：非法字符替换为下划线，控制字符直接删除，
+# 一次 C 层 translate 即可完成，无需多趟 replace + 正则
+_FILENAME_TABLE = str.maketrans(
+    {c: '_' for c in '<>:"/\\|?*'}
+    | {chr(c): None for c in range(0x20)}
+    | {chr(c): None for c in range(0x7f, 0xa0)}
+)
 
 
 def sanitize_filename(filename: str, max_length: int = 200) -> str:
@@ -27,13 +65,8 @@ def sanitize_filename(filename: str, max_length: int = 200) -> str:
     Returns:
         清理后的文件名
     """
-    # 移除非法字符
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-
-    # 移除控制字符
-    filename = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', filename)
+    # 替换非法字符并移除控制字符（单趟 translate）
+    filename = filename.translate(_FILENAME_TABLE)
 
     # 移除首尾空格和点
     filename = filename.strip(' .')
@@ -45,10 +78,13 @@ def sanitize_filename(filename: str, max_length: int = 200) -> str:
     return filename or 'unnamed'
 
 
+@lru_cache(maxsize=4096)
 def extract_bvid(url: str) -> Optional[str]:
     """
     从 B站 URL 中提取 BV 号
 
+    批量流程中同一 URL 会在多个环节反复解析，结果做 LRU 缓存。
+
     Args:
         url: B站视频 URL
 
@@ -56,14 +92,22 @@ def extract_bvid(url: str) -> Optional[str]:
         BV 号，如果提取失败返回 None
     """
     # 匹配 BV 开头的 ID
-    match = re.search(r'BV[a-zA-Z0-9]{10}', url)
+    match = _BVID_RE.search(url)
     return match.group(0) if match else None
 
 
+# 已解析成功的 @用户名 → UID 映射；只缓存成功结果，
+# 一次网络抖动不会把 None 粘住到进程退出
+_USERNAME_UID_CACHE: Dict[str, str] = {}
+
+
 def extract_uid(url: str) -> Optional[str]:
     """
     从 B站空间 URL 中提取 UID
 
+    @用户名 形式需要走一次 API 查询，成功的解析会被缓存，
+    失败不缓存，下次调用重新请求。
+
     Args:
         url: B站空间 URL
 
@@ -71,18 +115,23 @@ def extract_uid(url: str) -> Optional[str]:
         UID（数字），如果提取失败返回 None
     """
     # 匹配 space.bilibili.com/数字 格式
-    match = re.search(r'space\.bilibili\.com/(\d+)', url)
+    match = _UID_SPACE_RE.search(url)
     if match:
         return match.group(1)
 
     # 匹配 space.bilibili.com/@用户名 格式，需要通过 API 获取 UID
-    match = re.search(r'space\.bilibili\.com/@([^/]+)', url)
+    match = _UID_AT_RE.search(url)
     if match:
         username = match.group(1)
-        return get_uid_by_username(username)
+        uid = _USERNAME_UID_CACHE.get(username)
+        if uid is None:
+            uid = get_uid_by_username(username)
+            if uid:
+                _USERNAME_UID_CACHE[username] = uid
+        return uid
 
     # 匹配纯数字
-    match = re.search(r'/(\d+)$', url)
+    match = _UID_TRAIL_RE.search(url)
     return match.group(1) if match else None
 
 
@@ -96,9 +145,10 @@ def get_uid_by_username(username: str) -> Optional[str]:
     Returns:
         UID（数字），如果获取失败返回 None
     """
-    try:
-        import requests
+    if not REQUESTS_AVAILABLE:
+        return None
 
+    try:
         # 使用 B站 API 通过用户名获取用户信息
         # 方法1: 使用搜索 API
         api_url = "https://api.bilibili.com/x/web-interface/search/type"
@@ -107,13 +157,13 @@ def get_uid_by_username(username: str) -> Optional[str]:
             'search_type': 'bili_user',
         }
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Referer': 'https://www.bilibili.com',
-        }
+        @retry_on_failure(max_retries=3, delay=1.0)
+        def _fetch():
+            response = _get_bili_session().get(api_url, params=params, timeout=10)
+            response.raise_for_status()
+            return response.json()
 
-        response = requests.get(api_url, params=params, headers=headers, timeout=10)
-        data = response.json()
+        data = _fetch()
 
         if data.get('code') == 0:
             results = data.get('data', {}).get('result', [])
@@ -172,17 +222,22 @@ def format_date(date_str: str) -> str:
     return f"{year}-{month}-{day}"
 
 
-def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
+def retry_on_failure(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0):
     """
-    失败重试装饰器
+    失败重试装饰器（指数退避）
+
+    瞬时故障第一次重试间隔短，持续故障则逐次放大间隔；
+    限流类 HTTP 错误优先遵循服务端返回的 Retry-After。
 
     Args:
         max_retries: 最大重试次数
-        delay: 重试间隔（秒）
+        delay: 首次重试间隔（秒）
+        backoff: 每次失败后间隔的放大倍数
     """
     def decorator(func):
         def wrapper(*args, **kwargs):
             last_exception = None
+            current_delay = delay
 
             for attempt in range(max_retries):
                 try:
@@ -190,7 +245,17 @@ def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
                 except Exception as e:
                     last_exception = e
                     if attempt < max_retries - 1:
-                        time.sleep(delay)
+                        sleep_time = current_delay
+                        if REQUESTS_AVAILABLE and isinstance(e, requests.HTTPError):
+                            response = getattr(e, 'response', None)
+                            retry_after = response.headers.get('Retry-After') if response is not None else None
+                            if retry_after:
+                                try:
+                                    sleep_time = float(retry_after)
+                                except ValueError:
+                                    pass
+                        time.sleep(sleep_time)
+                        current_delay *= backoff
 
             raise last_exception
 
@@ -217,16 +282,21 @@ def generate_unique_filepath(directory: Path, filename: str) -> Path:
     # 分离文件名和扩展名
     stem = filepath.stem
     suffix = filepath.suffix
-    counter = 1
 
-    while True:
-        new_filename = f"{stem}_{counter}{suffix}"
-        new_filepath = directory / new_filename
+    # 指数探测找到第一个不存在的序号上界，再二分定位，
+    # 目录里已有大量同名序号文件时 stat 次数从 O(N) 降到 O(log N)
+    lo, hi = 1, 1
+    while (directory / f"{stem}_{hi}{suffix}").exists():
+        lo, hi = hi + 1, hi * 2
 
-        if not new_filepath.exists():
-            return new_filepath
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if (directory / f"{stem}_{mid}{suffix}").exists():
+            lo = mid + 1
+        else:
+            hi = mid
 
-        counter += 1
+    return directory / f"{stem}_{lo}{suffix}"
 
 
 def parse_subtitles(subtitle_file: Path) -> List[Dict]:
@@ -239,72 +309,115 @@ def parse_subtitles(subtitle_file: Path) -> List[Dict]:
     Returns:
         字幕片段列表，每个片段包含 'start'、'end'、'text'
     """
-    content = subtitle_file.read_text(encoding='utf-8')
-    subtitles = []
+    # JSON 字幕直接读字节，orjson 内部的 UTF-8 解码更快
+    if subtitle_file.suffix == '.json':
+        return _parse_json_subtitle(subtitle_file.read_bytes())
 
-    # 根据文件扩展名选择解析方式
+    # 根据文件扩展名选择解析方式，逐行流式读取，
+    # 峰值内存只与单条字幕块相关，与文件大小无关
     if subtitle_file.suffix == '.ass':
-        subtitles = _parse_ass(content)
+        with subtitle_file.open('r', encoding='utf-8', buffering=1 << 16) as f:
+            return _parse_ass(f)
     elif subtitle_file.suffix == '.srt':
-        subtitles = _parse_srt(content)
-    elif subtitle_file.suffix == '.json':
-        subtitles = _parse_json_subtitle(content)
+        with subtitle_file.open('r', encoding='utf-8', buffering=1 << 16) as f:
+            return _parse_srt(f)
+
+    return []
 
-    return subtitles
 
+def _parse_ass(lines: Iterable[str]) -> List[Dict]:
+    """解析 ASS 格式字幕（接受行迭代器，可直接传入打开的文件对象）
 
-def _parse_ass(content: str) -> List[Dict]:
-    """解析 ASS 格式字幕"""
+    逐行扫描，str.split 切字段，样式标签 {...} 在一趟循环内剥除，
+    全程不经过正则引擎，分配有界。
+    """
     subtitles = []
-    pattern = re.compile(
-        r'Dialog: \d+,\s*(\d+:\d+:\d+\.\d+),\s*(\d+:\d+:\d+\.\d+),[^,]*,[^,]*,'
-        r'\d+,\d+,\d+,\d+,(.+)',
-        re.MULTILINE
-    )
-
-    for match in pattern.finditer(content):
-        start = match.group(1)
-        end = match.group(2)
-        text = match.group(3).replace('\\N', '\n').replace('\\n', '\n')
-        text = re.sub(r'\{[^}]*\}', '', text)  # 移除样式标签
+
+    for line in lines:
+        # 兼容标准 "Dialogue:" 和部分工具输出的 "Dialog:"
+        if line.startswith('Dialogue:'):
+            body = line[9:]
+        elif line.startswith('Dialog:'):
+            body = line[7:]
+        else:
+            continue
+
+        parts = body.split(',', 9)
+        if len(parts) < 10:
+            continue
+
+        start = parts[1].strip()
+        end = parts[2].strip()
+        text = parts[9]
+
+        # 单趟剥除 {...} 样式标签
+        if '{' in text:
+            out = []
+            depth = 0
+            for ch in text:
+                if ch == '{':
+                    depth += 1
+                elif ch == '}' and depth:
+                    depth -= 1
+                elif not depth:
+                    out.append(ch)
+            text = ''.join(out)
+
+        text = text.replace('\\N', '\n').replace('\\n', '\n').strip()
 
         subtitles.append({
             'start': _ass_time_to_seconds(start),
             'end': _ass_time_to_seconds(end),
-            'text': text.strip()
+            'text': text
         })
 
     return subtitles
 
 
-def _parse_srt(content: str) -> List[Dict]:
-    """解析 SRT 格式字幕"""
+def _parse_srt(lines: Iterable[str]) -> List[Dict]:
+    """解析 SRT 格式字幕（接受行迭代器，可直接传入打开的文件对象）
+
+    按空行攒块后切片取字段，单次线性扫描，没有正则回溯，
+    缓冲区内只保留当前字幕块。
+    """
     subtitles = []
-    pattern = re.compile(
-        r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\n|\Z)',
-        re.DOTALL
-    )
+    block = []
 
-    for match in pattern.finditer(content):
-        start = _srt_time_to_seconds(match.group(2))
-        end = _srt_time_to_seconds(match.group(3))
-        text = match.group(4).strip()
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line:
+            block.append(line)
+        elif block:
+            _emit_srt_block(block, subtitles)
+            block = []
 
-        subtitles.append({
-            'start': start,
-            'end': end,
-            'text': text
-        })
+    if block:
+        _emit_srt_block(block, subtitles)
 
     return subtitles
 
 
-def _parse_json_subtitle(content: str) -> List[Dict]:
-    """解析 JSON 格式字幕"""
-    import json
+def _emit_srt_block(block: List[str], subtitles: List[Dict]) -> None:
+    """将一个 SRT 字幕块追加到结果列表（格式不完整则跳过）"""
+    if len(block) < 3:
+        return
+
+    times = block[1]
+    arrow = times.find(' --> ')
+    if arrow < 0:
+        return
+
+    subtitles.append({
+        'start': _srt_time_to_seconds(times[:arrow].strip()),
+        'end': _srt_time_to_seconds(times[arrow + 5:].strip()),
+        'text': '\n'.join(block[2:]).strip()
+    })
 
+
+def _parse_json_subtitle(content) -> List[Dict]:
+    """解析 JSON 格式字幕（接受 str 或 bytes）"""
     try:
-        data = json.loads(content)
+        data = _json_loads(content)
         # 假设格式为 {"body": [{"from": 开始时间, "to": 结束时间, "content": 文本}]}
         if isinstance(data, dict) and 'body' in data:
             return [
@@ -315,29 +428,40 @@ def _parse_json_subtitle(content: str) -> List[Dict]:
                 }
                 for item in data['body']
             ]
-    except json.JSONDecodeError:
+    except ValueError:
         pass
 
     return []
 
 
 def _ass_time_to_seconds(time_str: str) -> float:
-    """将 ASS 时间格式转换为秒"""
-    parts = time_str.replace('.', ':').split(':')
-    if len(parts) == 4:
-        hours, minutes, seconds, centiseconds = map(float, parts)
-        return hours * 3600 + minutes * 60 + seconds + centiseconds / 100
-    return 0.0
+    """将 ASS 时间格式（H:MM:SS.cc）转换为秒
+
+    整数解析比 float 解析快，每行只做一次浮点运算。
+    """
+    try:
+        hours, minutes, rest = time_str.split(':', 2)
+        seconds, centiseconds = rest.split('.', 1)
+        return (
+            int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+            + int(centiseconds) * 0.01
+        )
+    except ValueError:
+        return 0.0
 
 
 def _srt_time_to_seconds(time_str: str) -> float:
-    """将 SRT 时间格式转换为秒"""
-    time_str = time_str.replace(',', '.')
-    parts = time_str.split(':')
-    if len(parts) == 3:
-        hours, minutes, seconds = map(float, parts)
-        return hours * 3600 + minutes * 60 + seconds
-    return 0.0
+    """将 SRT 时间格式（HH:MM:SS,mmm）转换为秒
+
+    定宽切片直接取各字段，免去 split + map(float) 的逐段浮点解析。
+    """
+    try:
+        return (
+            int(time_str[0:2]) * 3600 + int(time_str[3:5]) * 60
+            + int(time_str[6:8]) + int(time_str[9:12]) * 0.001
+        )
+    except ValueError:
+        return 0.0
 
 
 def merge_subtitles(subtitles: List[Dict], max_gap: float = 1.0) -> str:
@@ -354,19 +478,19 @@ def merge_subtitles(subtitles: List[Dict], max_gap: float = 1.0) -> str:
     if not subtitles:
         return ''
 
-    text_parts = []
-    last_end = 0
+    # 一趟推导式预先算出所有分段点（集合元素 i 表示第 i 条前插入空行），
+    # 循环体内只剩集合查找，避免逐条做浮点比较分支
+    break_before = {
+        i + 1
+        for i, (cur, nxt) in enumerate(zip(subtitles, subtitles[1:]))
+        if cur['end'] > 0 and (nxt['start'] - cur['end']) > max_gap
+    }
 
-    for sub in subtitles:
-        current_start = sub['start']
-        current_text = sub['text']
-
-        # 如果间隔太大，添加分段
-        if last_end > 0 and (current_start - last_end) > max_gap:
+    text_parts = []
+    for i, sub in enumerate(subtitles):
+        if i in break_before:
             text_parts.append('')  # 空行分段
-
-        text_parts.append(current_text)
-        last_end = sub['end']
+        text_parts.append(sub['text'])
 
     return '\n'.join(text_parts).strip()
 
@@ -381,68 +505,92 @@ def convert_to_simplified(text: str) -> str:
     Returns:
         转换后的简体中文文本，如果 opencc 不可用则返回原文本
     """
-    if not OPENCC_AVAILABLE:
+    # 纯 ASCII 文本不含任何可转换字符，免去整趟字典查找
+    if text.isascii():
+        return text
+
+    converter = _get_t2s_converter()
+    if converter is None:
         return text
 
     try:
-        converter = opencc.OpenCC('t2s')  # 繁体转简体
         return converter.convert(text)
     except Exception:
         return text
 
 
-def group_segments_to_paragraphs(segments: List[Dict], max_gap: float = 1.5, paragraph_length: int = 300) -> str:
+@lru_cache(maxsize=1)
+def _get_t2s_converter():
+    """获取繁转简转换器，未安装 opencc 时返回 None
+
+    opencc 的导入和 OpenCC 构造（磁盘加载字典）都延迟到首次
+    真正需要转换时，纯字幕/--help 路径不背这个启动开销。
     """
-    将 Whisper 的分段信息组织成段落
+    try:
+        import opencc
+    except ImportError:
+        return None
+    return opencc.OpenCC('t2s')
+
+
+def iter_paragraphs(segments: List[Dict], max_gap: float = 1.5, paragraph_length: int = 300) -> Iterator[str]:
+    """
+    将 Whisper 的分段信息组织成段落，逐段产出
+
+    生成器形式：任意时刻只驻留当前段落的几行文本，
+    长视频的转写不必先在内存里拼出整篇大字符串。
 
     Args:
         segments: Whisper 分段列表，每个包含 start, end, text
         max_gap: 最大时间间隔（秒），超过此间隔则新起段落
         paragraph_length: 每个段落的字符数目标
 
-    Returns:
-        组织成段落的文本
+    Yields:
+        组织好的单个段落（段内以换行分隔）
     """
-    if not segments:
-        return ''
-
-    paragraphs = []
+    total = len(segments)
+    current = []
     current_chars = 0
-    current_lines = []
 
     for i, segment in enumerate(segments):
         text = segment['text'].strip()
         if not text:
             continue
 
-        # 检查是否需要新起段落
-        should_break = False
-
-        # 基于时间间隔的判断（语音停顿超过阈值）
-        if i < len(segments) - 1:
-            next_segment = segments[i + 1]
-            gap = next_segment['start'] - segment['end']
-            if gap > max_gap and current_chars > 50:  # 至少有一些内容才分段
-                should_break = True
-
-        # 基于段落长度的判断（避免段落过长）
-        if current_chars + len(text) > paragraph_length:
-            should_break = True
-
-        if should_break:
-            if current_lines:
-                # 将多行合并成一个段落，保留换行以提高可读性
-                paragraph = '\n'.join(current_lines)
-                paragraphs.append(paragraph.strip())
-                current_lines = []
-                current_chars = 0
-
-        current_lines.append(text)
+        # 当前分段之后是否存在超阈值停顿
+        gap_break = (
+            i + 1 < total
+            and (segments[i + 1]['start'] - segment['end']) > max_gap
+        )
+
+        # 基于时间间隔的判断（语音停顿超过阈值，且至少有一些内容才分段）
+        # 或基于段落长度的判断（避免段落过长）
+        if current and (
+            (gap_break and current_chars > 50)
+            or current_chars + len(text) > paragraph_length
+        ):
+            yield '\n'.join(current)
+            current = []
+            current_chars = 0
+
+        current.append(text)
         current_chars += len(text)
 
-    # 添加最后一个段落
-    if current_lines:
-        paragraph = '\n'.join(current_lines)
-        paragraphs.append(paragraph.strip())
+    if current:
+        yield '\n'.join(current)
+
 
-    return '\n\n'.join(paragraphs)
+def group_segments_to_paragraphs(segments: List[Dict], max_gap: float = 1.5, paragraph_length: int = 300) -> str:
+    """
+    将 Whisper 的分段信息组织成段落
+
+    Args:
+        segments: Whisper 分段列表，每个包含 start, end, text
+        max_gap: 最大时间间隔（秒），超过此间隔则新起段落
+        paragraph_length: 每个段落的字符数目标
+
+    Returns:
+        组织成段落的文本
+    """
+    # 将多行合并成段落，保留换行以提高可读性
+    return '\n\n'.join(iter_paragraphs(segments, max_gap, paragraph_length))
@@ -3,26 +3,507 @@
 使用大模型 API 对识别结果进行校验和优化
 """
 
+import asyncio
+import atexit
+import hashlib
 import json
 import logging
-from typing import Optional, Dict
+import random
+import re
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+
+# openai 导入耗时数百毫秒，延迟到真正创建校验器时再加载，
+# 让 --help 和纯字幕路径不背这个启动开销
+OpenAI = None
+AsyncOpenAI = None
+APIError = None
+RateLimitError = None
+_OPENAI_IMPORT_TRIED = False
+
+
+def _load_openai() -> bool:
+    """首次调用时导入 openai 并填充模块级名字，返回是否可用"""
+    global OpenAI, AsyncOpenAI, APIError, RateLimitError, _OPENAI_IMPORT_TRIED
+    if _OPENAI_IMPORT_TRIED:
+        return OpenAI is not None
+    _OPENAI_IMPORT_TRIED = True
+    try:
+        from openai import (
+            OpenAI as _openai,
+            AsyncOpenAI as _async_openai,
+            APIError as _api_error,
+            RateLimitError as _rate_limit_error,
+        )
+    except ImportError:
+        return False
+    OpenAI = _openai
+    AsyncOpenAI = _async_openai
+    APIError = _api_error
+    RateLimitError = _rate_limit_error
+    return True
 
 try:
-    from openai import OpenAI
+    import httpx
 except ImportError:
-    OpenAI = None
+    httpx = None
 
-from config import config
+try:
+    from json_repair import repair_json
+except ImportError:
+    repair_json = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# 提取大模型返回中的 JSON 对象：优先取代码块内的，退而求其次取裸对象
+_JSON_BLOCK = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```|(\{.*\})", re.S)
+
+try:  # 包方式运行（python -m src.vtw）
+    from .config import config
+except ImportError:  # 脚本方式运行（python src/vtw.py）
+    from config import config
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4)
+def _get_encoder(model: str):
+    """获取并缓存指定模型的 tiktoken 编码器，tiktoken 不可用时返回 None"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # 自定义/第三方模型名不在 tiktoken 映射表里，用通用编码兜底
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def _truncate_middle(text: str, model: str, max_tokens: int) -> str:
+    """
+    按 token 预算截断文本，超出预算时丢弃中间、保留首尾
+
+    中英混排文本按字符数截断很不准（中文约 1 字 1 token，英文约
+    4 字符 1 token）；安装了 tiktoken 时按真实 token 数计算，
+    否则退化为保守的"1 字符 ≈ 1 token"估算。
+
+    Args:
+        text: 原始文本
+        model: 模型名（用于选择编码器）
+        max_tokens: 文本部分的 token 预算
+
+    Returns:
+        不超过预算的文本
+    """
+    marker = "\n……（中间内容已省略）……\n"
+    enc = _get_encoder(model)
+
+    if enc is not None:
+        ids = enc.encode(text)
+        if len(ids) <= max_tokens:
+            return text
+        keep = max_tokens // 2
+        return enc.decode(ids[:keep]) + marker + enc.decode(ids[-(max_tokens - keep):])
+
+    if len(text) <= max_tokens:
+        return text
+    keep = max_tokens // 2
+    return text[:keep] + marker + text[-(max_tokens - keep):]
+
+
+# 全进程共享的 OpenAI 客户端：长连接 + 连接池，
+# 避免每个校验器实例各建客户端、每次请求重做 TLS 握手
+_SHARED_CLIENT = None
+_SHARED_ASYNC_CLIENT = None
+
+
+def _make_http_limits():
+    """根据并发配置生成 httpx 连接池参数"""
+    max_connections = config.get('llm.max_concurrency', 4) * 2
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=60.0,
+    )
+
+
+def _get_shared_client() -> 'OpenAI':
+    """获取共享的同步 OpenAI 客户端"""
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None:
+        llm_config = config.llm_config
+        kwargs = {
+            'api_key': llm_config['api_key'],
+            'base_url': llm_config['base_url'],
+        }
+        if httpx is not None:
+            kwargs['http_client'] = httpx.Client(
+                limits=_make_http_limits(),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+        _SHARED_CLIENT = OpenAI(**kwargs)
+    return _SHARED_CLIENT
+
+
+def _get_shared_async_client() -> 'AsyncOpenAI':
+    """获取共享的异步 OpenAI 客户端"""
+    global _SHARED_ASYNC_CLIENT
+    if _SHARED_ASYNC_CLIENT is None:
+        llm_config = config.llm_config
+        kwargs = {
+            'api_key': llm_config['api_key'],
+            'base_url': llm_config['base_url'],
+        }
+        if httpx is not None:
+            kwargs['http_client'] = httpx.AsyncClient(
+                limits=_make_http_limits(),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+        _SHARED_ASYNC_CLIENT = AsyncOpenAI(**kwargs)
+    return _SHARED_ASYNC_CLIENT
+
+
+@atexit.register
+def _close_shared_clients():
+    """进程退出时关闭共享客户端，释放连接池"""
+    if _SHARED_CLIENT is not None:
+        try:
+            _SHARED_CLIENT.close()
+        except Exception:
+            pass
+    if _SHARED_ASYNC_CLIENT is not None:
+        try:
+            asyncio.run(_SHARED_ASYNC_CLIENT.close())
+        except Exception:
+            pass
+
+
+class RateLimiter:
+    """异步令牌桶限流器
+
+    维护每分钟请求数和每分钟 token 数两个持续回填的令牌桶，
+    并发调用在配额耗尽时等待回填，让吞吐稳定贴着账号上限运行，
+    而不是在突发与退避之间震荡。
+    """
+
+    def __init__(self, max_requests_per_minute: float, max_tokens_per_minute: float):
+        """
+        初始化限流器
+
+        Args:
+            max_requests_per_minute: 每分钟最大请求数
+            max_tokens_per_minute: 每分钟最大 token 数
+        """
+        self.max_requests_per_minute = float(max_requests_per_minute)
+        self.max_tokens_per_minute = float(max_tokens_per_minute)
+        self.available_request_capacity = self.max_requests_per_minute
+        self.available_token_capacity = self.max_tokens_per_minute
+        self.last_update_time = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, estimated_tokens: int = 0) -> None:
+        """
+        申请一次请求配额，容量不足时等待令牌桶回填
+
+        Args:
+            estimated_tokens: 本次请求的预估 token 数（输入 + max_tokens）
+        """
+        # 预估超过桶容量的请求永远等不到足额回填，会把整个批次卡死在
+        # 无限轮询上；截断到容量上限，让请求在桶回满时放行
+        if estimated_tokens > self.max_tokens_per_minute:
+            logger.warning(
+                f"单次请求预估 {estimated_tokens} tokens，超过每分钟配额 "
+                f"{self.max_tokens_per_minute:.0f}，按配额上限放行"
+            )
+            estimated_tokens = self.max_tokens_per_minute
+
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                elapsed = now - self.last_update_time
+                self.available_request_capacity = min(
+                    self.available_request_capacity
+                    + self.max_requests_per_minute * elapsed / 60.0,
+                    self.max_requests_per_minute,
+                )
+                self.available_token_capacity = min(
+                    self.available_token_capacity
+                    + self.max_tokens_per_minute * elapsed / 60.0,
+                    self.max_tokens_per_minute,
+                )
+                self.last_update_time = now
+
+                if (self.available_request_capacity >= 1
+                        and self.available_token_capacity >= estimated_tokens):
+                    self.available_request_capacity -= 1
+                    self.available_token_capacity -= estimated_tokens
+                    return
+
+            await asyncio.sleep(0.5)
+
+
+class PromptCache:
+    """提示词精确匹配磁盘缓存
+
+    校验结果是 (模型, 系统提示, 用户提示, 采样参数) 的纯函数，
+    按 SHA-256 键落盘到 SQLite，重跑同一批视频时直接复用结果，
+    省去全部 API 延迟与费用。
+    """
+
+    def __init__(self, db_path):
+        """
+        初始化缓存
+
+        Args:
+            db_path: SQLite 数据库路径
+        """
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS prompt_cache ('
+            'key TEXT PRIMARY KEY, '
+            'response TEXT, '
+            'created_at INTEGER)'
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model: str, system: str, prompt: str,
+                 temperature: float, max_tokens: int) -> str:
+        """由完整请求参数计算缓存键"""
+        payload = json.dumps(
+            [model, system, prompt, temperature, max_tokens],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的响应文本，未命中或已过期返回 None"""
+        row = self.conn.execute(
+            'SELECT response, created_at FROM prompt_cache WHERE key = ?',
+            (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        ttl = config.get('llm.cache_ttl_seconds', 7 * 24 * 3600)
+        if ttl and time.time() - row[1] > ttl:
+            return None
+
+        return row[0]
+
+    def set(self, key: str, response: str):
+        """写入响应文本"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO prompt_cache VALUES (?, ?, ?)',
+            (key, response, int(time.time()))
+        )
+        self.conn.commit()
+
+
+def _cosine_similarity(a, b) -> float:
+    """计算两个向量的余弦相似度"""
+    dot = 0.0
+    norm_a = 0.0
+    norm_b = 0.0
+    for x, y in zip(a, b):
+        dot += x * y
+        norm_a += x * x
+        norm_b += y * y
+    if norm_a == 0.0 or norm_b == 0.0:
+        return 0.0
+    return dot / (norm_a ** 0.5 * norm_b ** 0.5)
+
+
+class SemanticCache:
+    """基于嵌入向量的语义缓存
+
+    同一 UP 主的视频常有重录、分 P、转载，转写文本只差少量字词，
+    精确匹配缓存无法命中。对提示词计算 embedding 后与历史条目做
+    余弦相似度检索，相似度达到阈值时直接复用已校验结果。
+    """
+
+    # 检索时最多加载的最近条目数，控制纯 Python 相似度计算的开销
+    _MAX_CANDIDATES = 1000
+
+    def __init__(self, db_path):
+        """
+        初始化缓存
+
+        Args:
+            db_path: SQLite 数据库路径
+        """
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS semantic_cache ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'embedding TEXT, '
+            'response TEXT, '
+            'created_at INTEGER)'
+        )
+        self.conn.commit()
+
+    def lookup(self, embedding) -> Optional[str]:
+        """
+        按余弦相似度检索缓存
+
+        Args:
+            embedding: 查询向量
+
+        Returns:
+            相似度达到 llm.semantic_cache_threshold 的缓存响应，未命中返回 None
+        """
+        threshold = config.get('llm.semantic_cache_threshold', 0.95)
+        rows = self.conn.execute(
+            'SELECT embedding, response FROM semantic_cache '
+            'ORDER BY id DESC LIMIT ?',
+            (self._MAX_CANDIDATES,)
+        ).fetchall()
+
+        best_sim = 0.0
+        best_response = None
+        for emb_json, response in rows:
+            sim = _cosine_similarity(embedding, json.loads(emb_json))
+            if sim > best_sim:
+                best_sim = sim
+                best_response = response
+
+        if best_response is not None and best_sim >= threshold:
+            logger.debug(f"语义缓存相似度: {best_sim:.4f}")
+            return best_response
+
+        return None
+
+    def store(self, embedding, response: str):
+        """写入一条嵌入与响应"""
+        self.conn.execute(
+            'INSERT INTO semantic_cache (embedding, response, created_at) '
+            'VALUES (?, ?, ?)',
+            (json.dumps(embedding), response, int(time.time()))
+        )
+        self.conn.commit()
+
+
+# 全局共享的语义缓存（默认关闭，llm.semantic_cache_enabled 打开）
+_SEMANTIC_CACHE = None
+
+
+def _get_semantic_cache() -> Optional[SemanticCache]:
+    """获取懒加载的全局语义缓存，禁用或初始化失败返回 None"""
+    global _SEMANTIC_CACHE
+    if not config.get('llm.semantic_cache_enabled', False):
+        return None
+    if _SEMANTIC_CACHE is None:
+        try:
+            _SEMANTIC_CACHE = SemanticCache(config.output_dir / '.vtw_semcache.sqlite')
+        except Exception as e:
+            logger.warning(f"初始化语义缓存失败: {e}")
+            return None
+    return _SEMANTIC_CACHE
+
+
+# 全局共享的提示词缓存，两类校验器共用同一数据库
+_PROMPT_CACHE = None
+
+
+def _get_prompt_cache() -> Optional[PromptCache]:
+    """获取懒加载的全局提示词缓存，禁用或初始化失败返回 None"""
+    global _PROMPT_CACHE
+    if not config.get('llm.cache_enabled', True):
+        return None
+    if _PROMPT_CACHE is None:
+        try:
+            _PROMPT_CACHE = PromptCache(config.output_dir / '.vtw_cache.sqlite')
+        except Exception as e:
+            logger.warning(f"初始化提示词缓存失败: {e}")
+            return None
+    return _PROMPT_CACHE
+
+
+# 全局共享限流器，TextVerifier / KnowledgeVerifier 的并发调用共用同一配额
+_RATE_LIMITER = None
+
+
+def _get_rate_limiter() -> RateLimiter:
+    """获取懒加载的全局限流器"""
+    global _RATE_LIMITER
+    if _RATE_LIMITER is None:
+        _RATE_LIMITER = RateLimiter(
+            config.get('llm.max_requests_per_minute', 60),
+            config.get('llm.max_tokens_per_minute', 90000),
+        )
+    return _RATE_LIMITER
+
+
+async def _chat_completion_with_retry(aclient, model: str, messages: list,
+                                      max_tokens: int, stream: bool = False):
+    """
+    带限流和指数退避重试的异步 chat.completions 调用
+
+    限流失败或服务端错误按 2^attempt + 随机抖动退避重试，
+    其他异常（如参数错误）直接抛出。
+
+    Args:
+        aclient: AsyncOpenAI 客户端
+        model: 模型名称
+        messages: 消息列表
+        max_tokens: 最大输出 token 数
+        stream: 是否流式返回（重试只覆盖建立请求，不覆盖流中途断开）
+
+    Returns:
+        API 响应对象，stream=True 时为异步分块迭代器
+    """
+    limiter = _get_rate_limiter()
+    # 粗估输入 token（中文约 1 字 1 token，保守按字符数一半）加上输出上限
+    estimated_tokens = sum(len(m['content']) for m in messages) // 2 + max_tokens
+    max_attempts = config.get('llm.max_attempts', 5)
+    last_error = None
+
+    for attempt in range(max_attempts):
+        await limiter.acquire(estimated_tokens)
+        try:
+            return await aclient.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=max_tokens,
+                stream=stream,
+            )
+        except (RateLimitError, APIError) as e:
+            last_error = e
+            if attempt < max_attempts - 1:
+                wait = 2 ** attempt + random.random()
+                logger.warning(f"API 调用失败（第 {attempt + 1} 次）: {e}，{wait:.1f}s 后重试")
+                await asyncio.sleep(wait)
+
+    raise last_error
+
+
 class TextVerifier:
     """文本校验器"""
 
+    # 长指令块放进 system 消息作为稳定前缀（OpenAI 对足够长的公共
+    # 前缀自动做提示词缓存计费），动态内容全部排在末尾的 user 消息里
+    _SYSTEM_PROMPT = """你是一个专业的文本校验助手。
+
+请对用户提供的中文文本进行校验和优化：
+
+1. 修正错别字和同音字错误
+2. 优化标点符号使用
+3. 统一术语表达
+4. 保持原有的段落结构和换行
+5. 不要添加或删除内容
+6. 不要添加任何解释或说明
+
+直接输出校验后的文本，不要添加任何前缀或说明。"""
+
     def __init__(self):
         """初始化校验器"""
-        if OpenAI is None:
+        if not _load_openai():
             raise ImportError("请安装 openai: pip install openai")
 
         self.llm_config = config.llm_config
@@ -30,10 +511,8 @@ class TextVerifier:
         if not self.llm_config['api_key']:
             logger.warning("未配置大模型 API Key，校验功能将不可用")
 
-        self.client = OpenAI(
-            api_key=self.llm_config['api_key'],
-            base_url=self.llm_config['base_url'],
-        )
+        self.client = _get_shared_client()
+        self.aclient = _get_shared_async_client()
 
         self.model = self.llm_config['model']
         self.provider = self.llm_config['provider']
@@ -73,12 +552,46 @@ class TextVerifier:
 
             prompt = self._build_prompt(text, video_title)
 
+            cache = _get_prompt_cache()
+            cache_key = None
+            if cache:
+                cache_key = PromptCache.make_key(
+                    self.model, self._SYSTEM_PROMPT, prompt, 0.3, 4000)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info("命中提示词缓存，跳过 API 调用")
+                    return {
+                        'text': cached,
+                        'changes': '已由大模型校验和优化',
+                    }
+
+            # 精确匹配未命中时尝试语义缓存（近似重复的转写文本）
+            sem_cache = _get_semantic_cache()
+            embedding = None
+            if sem_cache:
+                try:
+                    emb_response = self.client.embeddings.create(
+                        model=config.get('llm.embedding_model', 'text-embedding-3-small'),
+                        input=prompt[:4000],
+                    )
+                    embedding = emb_response.data[0].embedding
+                    hit = sem_cache.lookup(embedding)
+                    if hit is not None:
+                        logger.info("命中语义缓存，跳过 API 调用")
+                        return {
+                            'text': hit,
+                            'changes': '已由大模型校验和优化',
+                        }
+                except Exception as e:
+                    logger.warning(f"语义缓存查询失败: {e}")
+                    embedding = None
+
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "你是一个专业的文本校验助手。"
+                        "content": self._SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -91,6 +604,14 @@ class TextVerifier:
 
             result_text = response.choices[0].message.content.strip()
 
+            if cache:
+                cache.set(cache_key, result_text)
+            if sem_cache and embedding is not None:
+                try:
+                    sem_cache.store(embedding, result_text)
+                except Exception as e:
+                    logger.warning(f"写入语义缓存失败: {e}")
+
             logger.info("大模型校验完成")
 
             return {
@@ -102,38 +623,277 @@ class TextVerifier:
             logger.error(f"大模型校验失败: {e}")
             return None
 
-    def _build_prompt(self, text: str, video_title: str = "") -> str:
+    async def verify_text_async(
+        self,
+        text: str,
+        video_title: str = "",
+        video_description: str = ""
+    ) -> Optional[Dict]:
         """
-        构建提示词
+        verify_text 的异步版本，供批量处理时并发调用
 
         Args:
             text: 待校验的文本
-            video_title: 视频标题
+            video_title: 视频标题（用于上下文）
+            video_description: 视频描述（未使用，保留参数兼容性）
 
         Returns:
-            提示词
+            与 verify_text 相同的结果字典，失败返回 None
         """
-        context = f"这是关于「{video_title}」的视频字幕。" if video_title else ""
+        if not config.llm_enabled:
+            logger.info("大模型校验未启用，跳过校验")
+            return None
 
-        prompt = f"""{context}
+        if not self.llm_config['api_key']:
+            logger.warning("未配置 API Key，跳过校验")
+            return None
 
-请对以下中文文本进行校验和优化：
+        try:
+            prompt = self._build_prompt(text, video_title)
 
-1. 修正错别字和同音字错误
-2. 优化标点符号使用
-3. 统一术语表达
-4. 保持原有的段落结构和换行
-5. 不要添加或删除内容
-6. 不要添加任何解释或说明
+            cache = _get_prompt_cache()
+            cache_key = None
+            if cache:
+                cache_key = PromptCache.make_key(
+                    self.model, self._SYSTEM_PROMPT, prompt, 0.3, 4000)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info("命中提示词缓存，跳过 API 调用")
+                    return {
+                        'text': cached,
+                        'changes': '已由大模型校验和优化',
+                    }
 
-待校验文本：
+            # 精确匹配未命中时尝试语义缓存（近似重复的转写文本）
+            sem_cache = _get_semantic_cache()
+            embedding = None
+            if sem_cache:
+                try:
+                    emb_response = await self.aclient.embeddings.create(
+                        model=config.get('llm.embedding_model', 'text-embedding-3-small'),
+                        input=prompt[:4000],
+                    )
+                    embedding = emb_response.data[0].embedding
+                    hit = sem_cache.lookup(embedding)
+                    if hit is not None:
+                        logger.info("命中语义缓存，跳过 API 调用")
+                        return {
+                            'text': hit,
+                            'changes': '已由大模型校验和优化',
+                        }
+                except Exception as e:
+                    logger.warning(f"语义缓存查询失败: {e}")
+                    embedding = None
+
+            response = await _chat_completion_with_retry(
+                self.aclient,
+                self.model,
+                [
+                    {
+                        "role": "system",
+                        "content": self._SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                max_tokens=4000,
+            )
+
+            result_text = response.choices[0].message.content.strip()
+
+            if cache:
+                cache.set(cache_key, result_text)
+            if sem_cache and embedding is not None:
+                try:
+                    sem_cache.store(embedding, result_text)
+                except Exception as e:
+                    logger.warning(f"写入语义缓存失败: {e}")
+
+            return {
+                'text': result_text,
+                'changes': '已由大模型校验和优化',
+            }
+
+        except Exception as e:
+            logger.error(f"大模型校验失败: {e}")
+            return None
+
+    def verify_text_many(self, items: List[Tuple[str, str]]) -> List[Optional[Dict]]:
+        """
+        批量校验多条文本，短文本打包进同一次请求
+
+        短视频批量处理时逐条请求会撞到每分钟请求数上限，
+        将多条文本编号后合并为一次调用可按打包数成倍提升吞吐，
+        并省去重复的指令 token。
+
+        Args:
+            items: (text, video_title) 元组列表
+
+        Returns:
+            与输入等长的结果列表，元素与 verify_text 的返回格式相同
+        """
+        if not config.llm_enabled or not self.llm_config['api_key']:
+            return [None] * len(items)
+
+        # 单次请求的字符预算（粗估 token），超长文本退回单条校验
+        budget = config.get('llm.batch_char_budget', 6000)
+        results: List[Optional[Dict]] = [None] * len(items)
+
+        batch: List[Tuple[int, str, str]] = []
+        batch_chars = 0
+
+        def _flush():
+            nonlocal batch, batch_chars
+            if not batch:
+                return
+            if len(batch) == 1:
+                idx, title, text = batch[0]
+                results[idx] = self.verify_text(text, title)
+            else:
+                outputs = self._verify_batch([(title, text) for _, title, text in batch])
+                for (idx, title, text), output in zip(batch, outputs):
+                    if output:
+                        results[idx] = {
+                            'text': output,
+                            'changes': '已由大模型校验和优化',
+                        }
+                    else:
+                        # 批量解析缺失的条目退回单条校验
+                        results[idx] = self.verify_text(text, title)
+            batch = []
+            batch_chars = 0
+
+        for idx, (text, title) in enumerate(items):
+            if len(text) > budget:
+                results[idx] = self.verify_text(text, title)
+                continue
+            if batch and batch_chars + len(text) > budget:
+                _flush()
+            batch.append((idx, title, text))
+            batch_chars += len(text)
+
+        _flush()
+        return results
+
+    def _verify_batch(self, pairs: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        单次请求校验多条文本
+
+        Args:
+            pairs: (video_title, text) 元组列表
+
+        Returns:
+            逐条校验后的文本列表，整体失败时全部为 None
+        """
+        try:
+            prompt = self._build_batch_prompt(pairs)
+
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": self._SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.3,
+                max_tokens=4000,
+            )
+
+            result_text = response.choices[0].message.content.strip()
+
+            # 剥除可能的 markdown 代码块
+            if "```" in result_text:
+                json_start = result_text.find('[')
+                json_end = result_text.rfind(']')
+                if json_start >= 0 and json_end > json_start:
+                    result_text = result_text[json_start:json_end + 1]
+
+            data = json.loads(result_text)
+
+            outputs: List[Optional[str]] = [None] * len(pairs)
+            for item in data:
+                i = int(item.get('id', 0)) - 1
+                if 0 <= i < len(pairs):
+                    outputs[i] = item.get('text')
+
+            logger.info(f"批量校验完成: {len(pairs)} 条文本一次请求")
+            return outputs
+
+        except Exception as e:
+            logger.error(f"批量校验失败: {e}")
+            return [None] * len(pairs)
+
+    def _build_batch_prompt(self, pairs: List[Tuple[str, str]]) -> str:
+        """
+        构建多文本合并校验提示词
+
+        Args:
+            pairs: (video_title, text) 元组列表
+
+        Returns:
+            提示词
+        """
+        parts = [
+            "请对下列编号的中文文本分别进行校验和优化：",
+            "",
+            "1. 修正错别字和同音字错误",
+            "2. 优化标点符号使用",
+            "3. 统一术语表达",
+            "4. 保持原有的段落结构和换行",
+            "5. 不要添加或删除内容",
+            "",
+            '请以严格的 JSON 数组返回，每个元素形如 {"id": 编号, "text": "校验后的文本"}，'
+            "不要添加任何其他说明。",
+            "",
+            "待校验文本：",
+        ]
+
+        for i, (title, text) in enumerate(pairs, 1):
+            context = f"（视频「{title}」）" if title else ""
+            parts.append(f"{i}.{context}")
+            parts.append("```")
+            parts.append(text)
+            parts.append("```")
+
+        return '\n'.join(parts)
+
+    # user 消息模板只含动态内容，指令块见 _SYSTEM_PROMPT
+    _PROMPT_TEMPLATE = """{context}待校验文本：
 ```
 {text}
-```
+```"""
+
+    @staticmethod
+    def _build_prompt(text: str, video_title: str = "") -> str:
+        """
+        构建 user 消息（仅动态内容，指令在 system 消息里）
+
+        Args:
+            text: 待校验的文本
+            video_title: 视频标题
+
+        Returns:
+            提示词
+        """
+        context = f"这是关于「{video_title}」的视频字幕。\n\n" if video_title else ""
+        return TextVerifier._PROMPT_TEMPLATE.format_map({
+            'context': context,
+            'text': text,
+        })
 
-直接输出校验后的文本，不要添加任何前缀或说明。"""
 
-        return prompt
+# 简单清理用的预编译正则：逐行去首尾空白（换行除外的空白字符），
+# 再把连续空行压成一个
+_LINE_EDGE_WS = re.compile(r'^[^\S\n]+|[^\S\n]+$', re.MULTILINE)
+_BLANK_RUN = re.compile(r'\n{3,}')
+_EDGE_BLANK = re.compile(r'^\n{2,}|\n{2,}$')
 
 
 class SimpleTextVerifier:
@@ -172,6 +932,15 @@ class SimpleTextVerifier:
             'changes': '已进行简单清理',
         }
 
+    async def verify_text_async(
+        self,
+        text: str,
+        video_title: str = "",
+        video_description: str = ""
+    ) -> Optional[Dict]:
+        """verify_text 的异步版本（纯 CPU 清理，直接同步执行）"""
+        return self.verify_text(text, video_title)
+
     def _simple_clean(self, text: str) -> str:
         """
         简单的文本清理
@@ -182,21 +951,13 @@ class SimpleTextVerifier:
         Returns:
             清理后的文本
         """
-        # 移除多余空行
-        lines = text.split('\n')
-        cleaned_lines = []
-        prev_empty = False
+        # 三趟 C 层正则代替逐行 Python 循环：去行首尾空白、压缩空行
+        if not text.strip():
+            return ''
 
-        for line in lines:
-            stripped = line.strip()
-            if stripped:
-                cleaned_lines.append(stripped)
-                prev_empty = False
-            elif not prev_empty:
-                cleaned_lines.append('')
-                prev_empty = True
-
-        return '\n'.join(cleaned_lines)
+        text = _LINE_EDGE_WS.sub('', text)
+        text = _BLANK_RUN.sub('\n\n', text)
+        return _EDGE_BLANK.sub('\n', text)
 
 
 class KnowledgeVerifier:
@@ -208,9 +969,46 @@ class KnowledgeVerifier:
     3. 生成总体总结
     """
 
+    # 长指令与 JSON 模式说明放进 system 消息作为稳定前缀，
+    # 解锁服务端提示词缓存；动态内容排在末尾的 user 消息里
+    _SYSTEM_PROMPT = """你是一个专业的知识内容整理助手。
+
+请对用户提供的教学/知识类视频转写内容进行结构化整理，完成以下任务：
+1. 将内容划分为 3-8 个逻辑章节
+2. 为每个章节生成合适的标题（简洁明了，8-15字）
+3. 为每个章节写 1-2 句小结
+4. 生成总体总结（3-5 句话，概括核心知识点和价值）
+
+请以 JSON 格式返回：
+{
+    "overall_summary": "总体总结：核心知识点和价值",
+    "chapters": [
+        {
+            "title": "章节标题",
+            "content": "该章节的完整内容（保留原文并优化格式）",
+            "summary": "章节小结：1-2句话"
+        }
+    ]
+}
+
+注意：
+- 章节划分要符合逻辑，不要随意分割
+- 标题要反映章节的核心内容
+- 章节内容要保留原文精华，不要过度删减
+- 小结要提炼章节的核心知识点
+- 确保返回的是有效的 JSON 格式，不要包含其他说明文字"""
+
+    # user 消息模板只含动态内容
+    _PROMPT_TEMPLATE = """{title_part}的教学/知识类视频转写内容。{desc_part}
+
+待整理文本：
+```
+{text}
+```"""
+
     def __init__(self):
         """初始化知识校验器"""
-        if OpenAI is None:
+        if not _load_openai():
             raise ImportError("请安装 openai: pip install openai")
 
         self.llm_config = config.llm_config
@@ -218,10 +1016,8 @@ class KnowledgeVerifier:
         if not self.llm_config['api_key']:
             logger.warning("未配置大模型 API Key，知识模式将不可用")
 
-        self.client = OpenAI(
-            api_key=self.llm_config['api_key'],
-            base_url=self.llm_config['base_url'],
-        )
+        self.client = _get_shared_client()
+        self.aclient = _get_shared_async_client()
 
         self.model = self.llm_config['model']
         self.provider = self.llm_config['provider']
@@ -267,12 +1063,22 @@ class KnowledgeVerifier:
 
             prompt = self._build_prompt(text, video_title, video_description)
 
+            cache = _get_prompt_cache()
+            cache_key = None
+            if cache:
+                cache_key = PromptCache.make_key(
+                    self.model, self._SYSTEM_PROMPT, prompt, 0.3, 8000)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info("命中提示词缓存，跳过 API 调用")
+                    return self._parse_result(cached)
+
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "你是一个专业的知识内容整理助手。"
+                        "content": self._SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -285,44 +1091,143 @@ class KnowledgeVerifier:
 
             result_text = response.choices[0].message.content.strip()
 
-            # 解析 JSON 结果
-            try:
-                # 尝试提取 JSON 部分（可能包含 markdown 代码块）
-                if "```json" in result_text:
-                    json_start = result_text.find("```json") + 7
-                    json_end = result_text.find("```", json_start)
-                    json_str = result_text[json_start:json_end].strip()
-                elif "```" in result_text:
-                    json_start = result_text.find("```") + 3
-                    json_end = result_text.find("```", json_start)
-                    json_str = result_text[json_start:json_end].strip()
-                else:
-                    json_str = result_text
+            # 先解析再写缓存：坏格式的返回不落盘，
+            # 否则整个 TTL 期内都会命中同一条无法解析的响应
+            result = self._parse_result(result_text)
 
-                result = json.loads(json_str)
+            if cache and result is not None:
+                cache.set(cache_key, result_text)
 
-                # 转换为标准格式
-                chapters = result.get('chapters', [])
-                overall_summary = result.get('overall_summary', '')
+            return result
 
-                logger.info(f"知识结构化完成，共识别 {len(chapters)} 个章节")
+        except Exception as e:
+            logger.error(f"知识模式处理失败: {e}")
+            return None
 
-                return {
-                    'summary': overall_summary,
-                    'chapters': chapters,
-                    'type': 'knowledge',
-                    'changes': f'已结构化并添加章节总结（共{len(chapters)}个章节）',
-                }
+    async def verify_text_async(
+        self,
+        text: str,
+        video_title: str = "",
+        video_description: str = ""
+    ) -> Optional[Dict]:
+        """
+        verify_text 的异步版本，供批量处理时并发调用
 
-            except json.JSONDecodeError as e:
-                logger.error(f"解析大模型返回的 JSON 失败: {e}")
-                logger.debug(f"返回内容: {result_text}")
-                return None
+        Args:
+            text: 待校验的文本
+            video_title: 视频标题
+            video_description: 视频描述
+
+        Returns:
+            与 verify_text 相同的结构化结果字典，失败返回 None
+        """
+        if not config.knowledge_mode_enabled:
+            logger.info("知识模式未启用")
+            return None
+
+        if not self.llm_config['api_key']:
+            logger.warning("未配置 API Key，跳过知识模式处理")
+            return None
+
+        try:
+            prompt = self._build_prompt(text, video_title, video_description)
+
+            cache = _get_prompt_cache()
+            cache_key = None
+            if cache:
+                cache_key = PromptCache.make_key(
+                    self.model, self._SYSTEM_PROMPT, prompt, 0.3, 8000)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info("命中提示词缓存，跳过 API 调用")
+                    return self._parse_result(cached)
+
+            # 流式接收：首 token 到达后即开始累积，事件循环在等待
+            # 剩余分块期间可以继续推进其他视频的提取/校验
+            response_stream = await _chat_completion_with_retry(
+                self.aclient,
+                self.model,
+                [
+                    {
+                        "role": "system",
+                        "content": self._SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                max_tokens=8000,
+                stream=True,
+            )
+
+            parts = []
+            async for chunk in response_stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+
+            result_text = ''.join(parts).strip()
+
+            # 先解析再写缓存：坏格式的返回不落盘，
+            # 否则整个 TTL 期内都会命中同一条无法解析的响应
+            result = self._parse_result(result_text)
+
+            if cache and result is not None:
+                cache.set(cache_key, result_text)
+
+            return result
 
         except Exception as e:
             logger.error(f"知识模式处理失败: {e}")
             return None
 
+    def _parse_result(self, result_text: str) -> Optional[Dict]:
+        """
+        解析大模型返回的 JSON 结果
+
+        Args:
+            result_text: 大模型返回的原始文本
+
+        Returns:
+            标准格式的结构化结果字典，解析失败返回 None
+        """
+        try:
+            # 提取 JSON 部分（可能包含 markdown 代码块或前后说明文字）
+            match = _JSON_BLOCK.search(result_text)
+            if match is None:
+                logger.error("未在大模型返回中找到 JSON 对象")
+                logger.debug(f"返回内容: {result_text}")
+                return None
+
+            json_str = next(g for g in match.groups() if g)
+
+            try:
+                result = json.loads(json_str)
+            except json.JSONDecodeError:
+                # 轻微格式错误（缺引号、尾逗号等）尝试修复，
+                # 避免整条昂贵的生成结果被丢弃重跑
+                if repair_json is None:
+                    raise
+                result = json.loads(repair_json(json_str))
+
+            # 转换为标准格式
+            chapters = result.get('chapters', [])
+            overall_summary = result.get('overall_summary', '')
+
+            logger.info(f"知识结构化完成，共识别 {len(chapters)} 个章节")
+
+            return {
+                'summary': overall_summary,
+                'chapters': chapters,
+                'type': 'knowledge',
+                'changes': f'已结构化并添加章节总结（共{len(chapters)}个章节）',
+            }
+
+        except json.JSONDecodeError as e:
+            logger.error(f"解析大模型返回的 JSON 失败: {e}")
+            logger.debug(f"返回内容: {result_text}")
+            return None
+
     def _build_prompt(
         self,
         text: str,
@@ -343,44 +1248,139 @@ class KnowledgeVerifier:
         title_part = f"这是关于「{video_title}」" if video_title else "这是"
         desc_part = f"\n视频描述：{video_description}" if video_description else ""
 
-        # 限制文本长度，避免超过 token 限制
-        max_text_length = 8000
-        if len(text) > max_text_length:
-            text = text[:max_text_length] + "..."
+        # 按 token 预算截断，超长时保留首尾、丢弃中间，
+        # 避免长视频只剩开头 8000 字的章节
+        max_prompt_tokens = config.get('llm.max_prompt_tokens', 8000)
+        text = _truncate_middle(text, self.model, max_prompt_tokens)
 
-        prompt = f"""{title_part}的教学/知识类视频转写内容。{desc_part}
+        return self._PROMPT_TEMPLATE.format_map({
+            'title_part': title_part,
+            'desc_part': desc_part,
+            'text': text,
+        })
 
-请对以下内容进行结构化整理，完成以下任务：
-1. 将内容划分为 3-8 个逻辑章节
-2. 为每个章节生成合适的标题（简洁明了，8-15字）
-3. 为每个章节写 1-2 句小结
-4. 生成总体总结（3-5 句话，概括核心知识点和价值）
 
-待整理文本：
-```
-{text}
-```
+class BatchVerifier:
+    """Batch API 批量校验器
 
-请以 JSON 格式返回：
-{{
-    "overall_summary": "总体总结：核心知识点和价值",
-    "chapters": [
-        {{
-            "title": "章节标题",
-            "content": "该章节的完整内容（保留原文并优化格式）",
-            "summary": "章节小结：1-2句话"
-        }}
-    ]
-}}
+    面向「整个 UP 主历史视频离线跑一遍」的场景：把全部校验请求
+    打包成一个 Batch 任务提交（费用减半、独立限额池、24 小时
+    完成窗口），轮询完成后按 custom_id 取回逐条结果。
+    """
 
-注意：
-- 章节划分要符合逻辑，不要随意分割
-- 标题要反映章节的核心内容
-- 章节内容要保留原文精华，不要过度删减
-- 小结要提炼章节的核心知识点
-- 确保返回的是有效的 JSON 格式，不要包含其他说明文字"""
+    def __init__(self, poll_interval: int = 60):
+        """
+        初始化批量校验器
+
+        Args:
+            poll_interval: 轮询任务状态的间隔（秒）
+        """
+        if not _load_openai():
+            raise ImportError("请安装 openai: pip install openai")
+
+        self.llm_config = config.llm_config
+        self.client = _get_shared_client()
+        self.model = self.llm_config['model']
+        self.poll_interval = poll_interval
 
-        return prompt
+    def submit(self, items: List[Tuple[str, str, str]]) -> str:
+        """
+        提交一个 Batch 任务
+
+        Args:
+            items: (custom_id, text, video_title) 三元组列表
+
+        Returns:
+            Batch 任务 ID
+        """
+        lines = []
+        for custom_id, text, video_title in items:
+            body = {
+                'model': self.model,
+                'messages': [
+                    {'role': 'system', 'content': TextVerifier._SYSTEM_PROMPT},
+                    {'role': 'user', 'content': TextVerifier._build_prompt(text, video_title)},
+                ],
+                'temperature': 0.3,
+                'max_tokens': 4000,
+            }
+            lines.append(json.dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': body,
+            }, ensure_ascii=False))
+
+        payload = '\n'.join(lines).encode('utf-8')
+        batch_file = self.client.files.create(
+            file=('vtw_batch.jsonl', payload),
+            purpose='batch',
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h',
+        )
+
+        logger.info(f"Batch 任务已提交: {batch.id}（共 {len(items)} 条）")
+        return batch.id
+
+    def wait(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """
+        阻塞等待 Batch 任务完成并取回结果
+
+        Args:
+            batch_id: Batch 任务 ID
+
+        Returns:
+            custom_id 到校验后文本的映射，失败条目为 None
+        """
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in ('completed', 'failed', 'expired', 'cancelled'):
+                break
+            logger.info(f"Batch 任务状态: {batch.status}，{self.poll_interval}s 后重查")
+            time.sleep(self.poll_interval)
+
+        if batch.status != 'completed' or not batch.output_file_id:
+            logger.error(f"Batch 任务未成功完成: {batch.status}")
+            return {}
+
+        content = self.client.files.content(batch.output_file_id)
+        results: Dict[str, Optional[str]] = {}
+
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                custom_id = record.get('custom_id')
+                response = record.get('response') or {}
+                body = response.get('body') or {}
+                choices = body.get('choices') or []
+                if custom_id and choices:
+                    results[custom_id] = choices[0]['message']['content'].strip()
+                elif custom_id:
+                    results[custom_id] = None
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                logger.warning(f"解析 Batch 结果行失败: {e}")
+
+        logger.info(f"Batch 任务完成，取回 {len(results)} 条结果")
+        return results
+
+    def verify_many(self, items: List[Tuple[str, str, str]]) -> Dict[str, Optional[str]]:
+        """
+        提交并等待一批校验，见 submit/wait
+
+        Args:
+            items: (custom_id, text, video_title) 三元组列表
+
+        Returns:
+            custom_id 到校验后文本的映射
+        """
+        if not items:
+            return {}
+        return self.wait(self.submit(items))
 
 
 def create_verifier() -> Optional['TextVerifier']:
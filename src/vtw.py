@@ -6,26 +6,47 @@ VTW - Bilibili 视频转文字工具
 
 import sys
 import argparse
+import asyncio
+import io
+import json
 import logging
+import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
-
-# 添加 src 目录到路径
-sys.path.insert(0, str(Path(__file__).parent))
-
-from config import config
-from utils import (
-    sanitize_filename,
-    format_duration,
-    format_date,
-    generate_unique_filepath,
-    convert_to_simplified,
-    group_segments_to_paragraphs,
-)
-from subtitle import SubtitleDownloader, get_up_videos
-from asr import ASREngine, transcribe_video
-from verifier import create_verifier
+from typing import Iterator, List, Dict, Optional, Tuple
+
+try:  # 包方式运行（python -m src.vtw）
+    from .config import config
+    from .utils import (
+        sanitize_filename,
+        format_duration,
+        format_date,
+        generate_unique_filepath,
+        convert_to_simplified,
+        iter_paragraphs,
+    )
+    from .subtitle import SubtitleDownloader, get_up_videos
+    from .verifier import create_verifier, BatchVerifier
+except ImportError:  # 脚本方式运行（python src/vtw.py），src 目录即 sys.path[0]
+    from config import config
+    from utils import (
+        sanitize_filename,
+        format_duration,
+        format_date,
+        generate_unique_filepath,
+        convert_to_simplified,
+        iter_paragraphs,
+    )
+    from subtitle import SubtitleDownloader, get_up_videos
+    from verifier import create_verifier, BatchVerifier
+
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
 
 # 配置日志
 logging.basicConfig(
@@ -35,6 +56,92 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class JobStore:
+    """批量处理的断点续跑状态存储
+
+    按视频记录流水线进度（extracted → done）和提取结果，落盘到
+    输出目录下的 SQLite。中断（Ctrl-C / 崩溃）后带 --resume 重跑时，
+    已完成的视频直接跳过，已提取未写盘的视频复用上次的转写文本，
+    免去最耗时的重复 ASR。
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        初始化状态存储
+
+        Args:
+            db_path: SQLite 数据库路径
+        """
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'bvid TEXT PRIMARY KEY, '
+            'stage TEXT, '
+            'text TEXT, '
+            'segments_json TEXT, '
+            'source TEXT, '
+            'updated_at INTEGER)'
+        )
+        self.conn.commit()
+        # 提取在线程池里跑，同一连接跨线程访问需要串行化
+        self._lock = threading.Lock()
+
+    def stage(self, bvid: str) -> Optional[str]:
+        """返回视频当前所处阶段（'extracted' / 'done'），无记录返回 None"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT stage FROM jobs WHERE bvid = ?', (bvid,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_extracted(
+        self,
+        bvid: str,
+        text: str,
+        segments: Optional[List[Dict]],
+        source: str
+    ):
+        """记录提取结果（字幕或 ASR 转写），进入 extracted 阶段"""
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)',
+                (bvid, 'extracted', text,
+                 json.dumps(segments, ensure_ascii=False) if segments else None,
+                 source, int(time.time()))
+            )
+            self.conn.commit()
+
+    def load_extracted(
+        self,
+        bvid: str
+    ) -> Optional[Tuple[str, Optional[List[Dict]], str]]:
+        """读取已保存的提取结果，无记录返回 None"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT text, segments_json, source FROM jobs '
+                'WHERE bvid = ? AND text IS NOT NULL',
+                (bvid,)
+            ).fetchone()
+        if row is None:
+            return None
+        segments = json.loads(row[1]) if row[1] else None
+        return row[0], segments, row[2]
+
+    def mark_done(self, bvid: str):
+        """文档写盘成功，标记视频处理完成"""
+        with self._lock:
+            self.conn.execute(
+                'UPDATE jobs SET stage = ?, updated_at = ? WHERE bvid = ?',
+                ('done', int(time.time()), bvid)
+            )
+            self.conn.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self.conn.close()
+
+
 class MarkdownGenerator:
     """Markdown 文档生成器"""
 
@@ -67,140 +174,189 @@ class MarkdownGenerator:
         Returns:
             生成的文件路径
         """
-        # 准备文件名
+        filepath = self._prepare_filepath(video_info)
+
+        # 逐块渲染、逐块写盘，不在内存里拼整篇文档
+        with open(filepath, 'w', encoding='utf-8') as f:
+            for chunk in self._iter_content(
+                video_info, text, segments, source, verification_info
+            ):
+                f.write(chunk)
+
+        logger.info(f"✓ 已保存: {filepath}")
+        return filepath
+
+    async def generate_async(
+        self,
+        video_info: Dict,
+        text: str,
+        segments: Optional[List[Dict]] = None,
+        source: str = "subtitle",
+        verification_info: Optional[Dict] = None
+    ) -> Path:
+        """
+        generate 的异步版本，渲染和写盘都不阻塞事件循环
+
+        安装了 aiofiles 时逐块异步写盘；否则整体退回线程池执行。
+        """
+        loop = asyncio.get_running_loop()
+
+        if not AIOFILES_AVAILABLE:
+            return await loop.run_in_executor(
+                None, self.generate,
+                video_info, text, segments, source, verification_info
+            )
+
+        filepath = self._prepare_filepath(video_info)
+
+        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
+            for chunk in self._iter_content(
+                video_info, text, segments, source, verification_info
+            ):
+                await f.write(chunk)
+
+        logger.info(f"✓ 已保存: {filepath}")
+        return filepath
+
+    def _prepare_filepath(self, video_info: Dict) -> Path:
+        """准备输出文件路径"""
         title = video_info.get('title', '未命名')
         if self.sanitize_filename:
             filename = f"{sanitize_filename(title)}.md"
         else:
             filename = f"{title}.md"
 
-        filepath = generate_unique_filepath(self.output_dir, filename)
+        return generate_unique_filepath(self.output_dir, filename)
 
-        # 智能排版（仅当有 segments 信息且来自 ASR 时）
+    def _iter_content(
+        self,
+        video_info: Dict,
+        text: str,
+        segments: Optional[List[Dict]],
+        source: str,
+        verification_info: Optional[Dict] = None
+    ) -> Iterator[str]:
+        """
+        逐块产出 Markdown 内容
+
+        头部与尾部各为一小块；标准模式正文逐段产出——ASR 来源
+        先流式分段（iter_paragraphs）、每段单独繁转简，任意时刻
+        只驻留一个段落，而不是整篇转写的多份拷贝。
+        """
+        # 正文段落来源：智能排版（仅当有 segments 信息且来自 ASR 时）
         if self.format_paragraphs and segments and source == "asr":
-            text = group_segments_to_paragraphs(segments)
+            paragraphs = iter_paragraphs(segments)
+        else:
+            paragraphs = iter([text])
+        segments = None  # 段落流建立后不再需要分段列表
 
         # 繁体转简体
         if self.convert_to_simplified:
-            text = convert_to_simplified(text)
+            paragraphs = (convert_to_simplified(p) for p in paragraphs)
 
-        # 生成内容
-        content = self._generate_content(
-            video_info,
-            text,
-            source,
-            verification_info
-        )
+        yield self._render_header(video_info, source, verification_info)
 
-        # 写入文件
-        filepath.write_text(content, encoding='utf-8')
-        logger.info(f"✓ 已保存: {filepath}")
-
-        return filepath
-
-    def _generate_content(
+        # 正文
+        if verification_info and verification_info.get('type') == 'knowledge':
+            # 知识模式：生成结构化的章节内容
+            yield from self._iter_knowledge_content(verification_info)
+        else:
+            # 标准模式：逐段输出
+            first = True
+            for paragraph in paragraphs:
+                if not first:
+                    yield "\n\n"
+                yield paragraph
+                first = False
+            yield "\n"
+
+        yield "\n---\n\n"
+        yield f"本文档由 [VTW](https://github.com/xiaoooooowen/vtw) 生成"
+
+    def _render_header(
         self,
         video_info: Dict,
-        text: str,
         source: str,
         verification_info: Optional[Dict] = None
     ) -> str:
-        """生成 Markdown 内容"""
-        lines = []
+        """渲染标题、总结与元数据头部"""
+        buf = io.StringIO()
+        w = buf.write
 
         # 标题
         title = video_info.get('title', '未命名')
-        lines.append(f"# {title}")
-        lines.append("")
+        w(f"# {title}\n\n")
 
         # 知识模式：在开头添加总体总结
         if verification_info and verification_info.get('type') == 'knowledge':
             if config.add_summary_at_top:
-                lines.extend(self._generate_summary_section(verification_info))
+                self._write_summary_section(w, verification_info)
 
         # 元数据
         if self.include_metadata:
-            lines.append("## 视频信息")
-            lines.append("")
-            lines.append(f"- **视频链接**: {video_info.get('url', '')}")
+            w("## 视频信息\n\n")
+            w(f"- **视频链接**: {video_info.get('url', '')}\n")
 
             upload_date = video_info.get('upload_date', '')
             if upload_date:
                 formatted_date = format_date(upload_date)
-                lines.append(f"- **上传时间**: {formatted_date}")
+                w(f"- **上传时间**: {formatted_date}\n")
 
             duration = video_info.get('duration', 0)
             if duration:
                 formatted_duration = format_duration(duration)
-                lines.append(f"- **时长**: {formatted_duration}")
+                w(f"- **时长**: {formatted_duration}\n")
 
-            lines.append(f"- **来源**: {'字幕' if source == 'subtitle' else '语音识别'}")
+            w(f"- **来源**: {'字幕' if source == 'subtitle' else '语音识别'}\n")
 
             if verification_info:
-                lines.append(f"- **处理模式**: {'知识模式' if verification_info.get('type') == 'knowledge' else '标准模式'}")
+                w(f"- **处理模式**: {'知识模式' if verification_info.get('type') == 'knowledge' else '标准模式'}\n")
 
-            lines.append("")
+            w("\n")
 
             # 知识模式的转写文本标题不同
             if verification_info and verification_info.get('type') == 'knowledge':
-                lines.append("## 详细内容")
+                w("## 详细内容\n\n")
             else:
-                lines.append("## 转写文本")
-            lines.append("")
+                w("## 转写文本\n\n")
 
-        # 正文
-        if verification_info and verification_info.get('type') == 'knowledge':
-            # 知识模式：生成结构化的章节内容
-            lines.extend(self._generate_knowledge_content(verification_info))
-        else:
-            # 标准模式：直接使用文本
-            lines.append(text)
+        return buf.getvalue()
 
-        lines.append("")
-        lines.append("---")
-        lines.append("")
-        lines.append(f"本文档由 [VTW](https://github.com/xiaoooooowen/vtw) 生成")
-
-        return '\n'.join(lines)
-
-    def _generate_summary_section(self, verification_info: Dict) -> List[str]:
-        """生成总结部分（开头）"""
-        lines = []
+    def _write_summary_section(self, w, verification_info: Dict) -> None:
+        """写入总结部分（开头）"""
         summary = verification_info.get('summary')
         if summary:
-            lines.append("## 内容总结")
-            lines.append("")
-            lines.append(summary)
-            lines.append("")
-        return lines
-
-    def _generate_knowledge_content(self, verification_info: Dict) -> List[str]:
-        """生成知识类章节内容"""
-        lines = []
+            w("## 内容总结\n\n")
+            w(summary)
+            w("\n\n")
+
+    def _iter_knowledge_content(self, verification_info: Dict) -> Iterator[str]:
+        """逐章节产出知识类内容"""
         chapters = verification_info.get('chapters', [])
 
         for idx, chapter in enumerate(chapters, 1):
+            buf = io.StringIO()
+            w = buf.write
+
             # 章节标题
             title = chapter.get('title', '未命名章节')
             if config.chapter_numbering:
-                lines.append(f"### {idx}. {title}")
+                w(f"### {idx}. {title}\n\n")
             else:
-                lines.append(f"### {title}")
-            lines.append("")
+                w(f"### {title}\n\n")
 
             # 章节小结
             if config.show_chapter_summary:
                 summary = chapter.get('summary', '')
                 if summary:
-                    lines.append(f"> {summary}")
-                    lines.append("")
+                    w(f"> {summary}\n\n")
 
             # 章节内容
             content = chapter.get('content', '')
-            lines.append(content)
-            lines.append("")
+            w(content)
+            w("\n\n")
 
-        return lines
+            yield buf.getvalue()
 
 
 class VideoProcessor:
@@ -213,10 +369,18 @@ class VideoProcessor:
         self.verifier = create_verifier()
         self.md_generator = MarkdownGenerator()
 
+    @staticmethod
+    def _job_key(video_info: Dict) -> str:
+        """断点续跑记录的主键，优先 BV 号（'id' 字段），缺失时退回 URL"""
+        return video_info.get('id') or video_info.get('url', '')
+
     def process_video(
         self,
         video_info: Dict,
-        use_asr: bool = False
+        use_asr: bool = False,
+        audio_file: Optional[Path] = None,
+        job_store: Optional[JobStore] = None,
+        resume: bool = False
     ) -> bool:
         """
         处理单个视频
@@ -224,10 +388,74 @@ class VideoProcessor:
         Args:
             video_info: 视频信息
             use_asr: 是否强制使用语音识别
+            audio_file: 已提取的音频文件（可选，跳过提取步骤）
+            job_store: 断点续跑状态存储（可选）
+            resume: 是否复用上次运行的提取结果
 
         Returns:
             处理是否成功
         """
+        key = self._job_key(video_info)
+
+        # 续跑时复用上次已保存的提取结果，跳过重复下载/ASR
+        cached = job_store.load_extracted(key) if (job_store and resume) else None
+        if cached:
+            text, segments, source = cached
+            logger.info(f"✓ 复用上次运行的提取结果: {video_info['title']}")
+        else:
+            text, segments, source = self._extract_text(video_info, use_asr, audio_file)
+
+        if not text or not text.strip():
+            logger.error("✗ 未能获取文本内容")
+            return False
+
+        if job_store and not cached:
+            job_store.save_extracted(key, text, segments, source)
+
+        # 大模型校验
+        verification_info = None
+        if self.verifier:
+            logger.info("正在进行文本校验...")
+            verification_result = self.verifier.verify_text(
+                text,
+                video_info['title'],
+                video_info.get('description', '')
+            )
+            text, verification_info = self._merge_verification(text, verification_result)
+
+        # 生成 Markdown
+        self.md_generator.generate(
+            video_info,
+            text,
+            segments if source == "asr" else None,
+            source,
+            verification_info
+        )
+
+        if job_store:
+            job_store.mark_done(key)
+
+        return True
+
+    def _extract_text(
+        self,
+        video_info: Dict,
+        use_asr: bool = False,
+        audio_file: Optional[Path] = None,
+        subtitle_text: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[List[Dict]], str]:
+        """
+        获取视频文本（字幕优先，必要时语音识别）
+
+        Args:
+            video_info: 视频信息
+            use_asr: 是否强制使用语音识别
+            audio_file: 已提取的音频文件（可选）
+            subtitle_text: 已预取的字幕文本（可选，跳过下载步骤）
+
+        Returns:
+            (text, segments, source) 三元组，失败时 text 为 None
+        """
         video_url = video_info['url']
         logger.info(f"\n{'='*60}")
         logger.info(f"处理视频: {video_info['title']}")
@@ -239,11 +467,15 @@ class VideoProcessor:
         source = "unknown"
 
         if not use_asr:
-            logger.info("尝试下载字幕...")
-            text = self.subtitle_downloader.download_subtitle(
-                video_url,
-                config.output_dir
-            )
+            if subtitle_text:
+                text = subtitle_text
+                logger.info("使用预取的字幕")
+            else:
+                logger.info("尝试下载字幕...")
+                text = self.subtitle_downloader.download_subtitle(
+                    video_url,
+                    config.output_dir
+                )
 
             if text:
                 source = "subtitle"
@@ -254,6 +486,13 @@ class VideoProcessor:
 
         # 如果没有字幕或强制使用 ASR
         if use_asr:
+            # ASR 栈（faster-whisper/PyTorch）加载很重，仅在真正
+            # 走语音识别时才导入，纯字幕路径保持秒级启动
+            try:
+                from .asr import ASREngine, transcribe_video
+            except ImportError:
+                from asr import ASREngine, transcribe_video
+
             if self.asr_engine is None:
                 logger.info("初始化语音识别引擎...")
                 self.asr_engine = ASREngine()
@@ -262,7 +501,8 @@ class VideoProcessor:
             result = transcribe_video(
                 video_url,
                 config.output_dir,
-                self.asr_engine
+                self.asr_engine,
+                audio_file=audio_file
             )
 
             if result:
@@ -272,53 +512,51 @@ class VideoProcessor:
                 logger.info("✓ 语音识别完成")
             else:
                 logger.error("✗ 语音识别失败")
-                return False
+                return None, None, source
 
-        if not text or not text.strip():
-            logger.error("✗ 未能获取文本内容")
-            return False
+        return text, segments, source
 
-        # 大模型校验
-        verification_info = None
-        if self.verifier:
-            logger.info("正在进行文本校验...")
-            video_description = video_info.get('description', '')
-            verification_result = self.verifier.verify_text(
-                text,
-                video_info['title'],
-                video_description
-            )
-            if verification_result:
-                # 知识模式：使用结构化数据，不覆盖原始文本
-                if verification_result.get('type') == 'knowledge':
-                    verification_info = verification_result
-                    logger.info(f"✓ 知识模式处理完成")
-                else:
-                    # 标准模式：使用校验后的文本
-                    text = verification_result['text']
-                    verification_info = verification_result
-                    logger.info("✓ 校验完成")
-            else:
-                logger.info("跳过校验")
+    @staticmethod
+    def _merge_verification(
+        text: str,
+        verification_result: Optional[Dict]
+    ) -> Tuple[str, Optional[Dict]]:
+        """
+        合并校验结果
 
-        # 生成 Markdown
-        self.md_generator.generate(
-            video_info,
-            text,
-            segments if source == "asr" else None,
-            source,
-            verification_info
-        )
+        Args:
+            text: 原始文本
+            verification_result: 校验器返回的结果
 
-        return True
+        Returns:
+            (text, verification_info)，知识模式保留原文，标准模式替换为校验后文本
+        """
+        if not verification_result:
+            logger.info("跳过校验")
+            return text, None
 
-    def process_videos(
+        # 知识模式：使用结构化数据，不覆盖原始文本
+        if verification_result.get('type') == 'knowledge':
+            logger.info("✓ 知识模式处理完成")
+            return text, verification_result
+
+        # 标准模式：使用校验后的文本
+        logger.info("✓ 校验完成")
+        return verification_result['text'], verification_result
+
+    async def _process_videos_async(
         self,
         videos: List[Dict],
-        force_asr: bool = False
+        force_asr: bool = False,
+        job_store: Optional[JobStore] = None,
+        resume: bool = False
     ) -> Dict[str, int]:
         """
-        批量处理视频
+        并发版批量处理（三段流水线）
+
+        提取（字幕/ASR，线程池）→ 校验（并发网络调用）→ 写盘，
+        段与段之间用有界队列衔接形成背压：视频 N 在等大模型校验时，
+        视频 N+1 已经在做语音识别，计算与网络 I/O 相互重叠。
 
         Args:
             videos: 视频列表
@@ -327,50 +565,405 @@ class VideoProcessor:
         Returns:
             处理统计信息
         """
+        loop = asyncio.get_running_loop()
         total = len(videos)
-        success = 0
+        delay = config.delay_between_requests
+
+        # 提取默认单线程（共享 ASR 模型），校验并发数即校验 worker 数，
+        # 队列深度限制同时驻留内存的转写文本数量
+        asr_workers = config.get('processing.asr_workers', 1)
+        verify_workers = config.get('llm.max_concurrency', 4)
+        depth = config.get('processing.pipeline_depth', 2)
+
+        extractor = ThreadPoolExecutor(max_workers=asr_workers)
+        input_q: asyncio.Queue = asyncio.Queue()
+        verify_q: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        write_q: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        stats = {'success': 0, 'failed': 0, 'skipped': 0}
+
+        for item in enumerate(videos, 1):
+            input_q.put_nowait(item)
+
+        def _extract_job(idx: int, video: Dict):
+            logger.info(f"\n[{idx}/{total}]")
+
+            # 续跑时复用上次已保存的提取结果，跳过重复下载/ASR
+            if job_store and resume:
+                cached = job_store.load_extracted(self._job_key(video))
+                if cached:
+                    logger.info(f"✓ 复用上次运行的提取结果: {video['title']}")
+                    return cached
+
+            result = self._extract_text(video, force_asr)
+            if idx < total and delay > 0:
+                time.sleep(delay)
+            return result
+
+        async def _extract_worker():
+            while True:
+                try:
+                    idx, video = input_q.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                # 已完成的视频直接跳过
+                if job_store and resume and \
+                        job_store.stage(self._job_key(video)) == 'done':
+                    logger.info(f"[{idx}/{total}] 已完成，跳过: {video['title']}")
+                    stats['skipped'] += 1
+                    continue
+
+                try:
+                    text, segments, source = await loop.run_in_executor(
+                        extractor, _extract_job, idx, video
+                    )
+                except Exception as e:
+                    logger.error(f"处理出错: {e}")
+                    stats['failed'] += 1
+                    continue
+
+                if not text or not text.strip():
+                    logger.error("✗ 未能获取文本内容")
+                    stats['failed'] += 1
+                    continue
+
+                if job_store:
+                    job_store.save_extracted(
+                        self._job_key(video), text, segments, source
+                    )
+
+                await verify_q.put((video, text, segments, source))
+
+        async def _verify_worker():
+            while True:
+                item = await verify_q.get()
+                if item is None:
+                    return
+                video, text, segments, source = item
+
+                verification_info = None
+                if self.verifier:
+                    logger.info("正在进行文本校验...")
+                    try:
+                        verification_result = await self.verifier.verify_text_async(
+                            text,
+                            video['title'],
+                            video.get('description', '')
+                        )
+                    except Exception as e:
+                        logger.error(f"校验出错: {e}")
+                        verification_result = None
+                    text, verification_info = self._merge_verification(
+                        text, verification_result
+                    )
+
+                await write_q.put((video, text, segments, source, verification_info))
+
+        async def _write_worker():
+            while True:
+                item = await write_q.get()
+                if item is None:
+                    return
+                video, text, segments, source, verification_info = item
+
+                try:
+                    await self.md_generator.generate_async(
+                        video,
+                        text,
+                        segments if source == "asr" else None,
+                        source,
+                        verification_info
+                    )
+                    if job_store:
+                        job_store.mark_done(self._job_key(video))
+                    stats['success'] += 1
+                except Exception as e:
+                    logger.error(f"处理出错: {e}")
+                    stats['failed'] += 1
+
+        writer = asyncio.create_task(_write_worker())
+        verify_tasks = [
+            asyncio.create_task(_verify_worker()) for _ in range(verify_workers)
+        ]
+
+        try:
+            await asyncio.gather(*[_extract_worker() for _ in range(asr_workers)])
+            for _ in verify_tasks:
+                await verify_q.put(None)
+            await asyncio.gather(*verify_tasks)
+            await write_q.put(None)
+            await writer
+        finally:
+            extractor.shutdown(wait=False)
+
+        return {
+            'total': total,
+            'success': stats['success'],
+            'failed': stats['failed'],
+            'skipped': stats['skipped'],
+        }
+
+    def _process_videos_batch(
+        self,
+        videos: List[Dict],
+        force_asr: bool = False,
+        job_store: Optional[JobStore] = None,
+        resume: bool = False
+    ) -> Dict[str, int]:
+        """
+        Batch API 版批量处理
+
+        先顺序提取全部视频的文本，再把所有校验打包成一个 Batch
+        任务提交（费用减半、独立限额池），等待完成后统一生成文档。
+        适合对时延不敏感的整库离线跑批。
+
+        Args:
+            videos: 视频列表
+            force_asr: 是否强制使用语音识别
+
+        Returns:
+            处理统计信息
+        """
+        total = len(videos)
+        delay = config.delay_between_requests
+        pending = []
         failed = 0
         skipped = 0
 
-        logger.info(f"\n开始处理 {total} 个视频...")
+        # 字幕预取：提取循环开始前并发拉取全部字幕（纯网络 I/O，
+        # 线程池扇出），循环内只剩解析与必要的 ASR
+        prefetched: Dict[str, Optional[str]] = {}
+        if not force_asr and total > 1:
+            try:
+                prefetched = self.subtitle_downloader.download_subtitles_batch(
+                    [v['url'] for v in videos], config.output_dir
+                )
+            except Exception as e:
+                logger.warning(f"字幕预取失败，回退逐个下载: {e}")
 
         for idx, video in enumerate(videos, 1):
             logger.info(f"\n[{idx}/{total}]")
 
-            try:
-                result = self.process_video(video, force_asr)
+            # 已完成的视频直接跳过，已提取的复用上次结果
+            cached = None
+            if job_store and resume:
+                key = self._job_key(video)
+                if job_store.stage(key) == 'done':
+                    logger.info(f"已完成，跳过: {video['title']}")
+                    skipped += 1
+                    continue
+                cached = job_store.load_extracted(key)
 
-                if result:
-                    success += 1
+            try:
+                if cached:
+                    logger.info(f"✓ 复用上次运行的提取结果: {video['title']}")
+                    text, segments, source = cached
                 else:
-                    failed += 1
+                    text, segments, source = self._extract_text(
+                        video, force_asr,
+                        subtitle_text=prefetched.get(video['url'])
+                    )
+            except Exception as e:
+                logger.error(f"处理出错: {e}")
+                failed += 1
+                continue
 
-                # 请求间隔
-                if idx < total:
-                    delay = config.delay_between_requests
-                    if delay > 0:
-                        time.sleep(delay)
+            if not text or not text.strip():
+                logger.error("✗ 未能获取文本内容")
+                failed += 1
+                continue
+
+            if job_store and not cached:
+                job_store.save_extracted(self._job_key(video), text, segments, source)
+
+            pending.append((video, text, segments, source))
+
+            if idx < total and delay > 0:
+                time.sleep(delay)
+
+        # 所有校验合并成一个 Batch 任务（统一使用标准校验提示词）
+        verified = {}
+        if pending and config.llm_enabled and config.llm_config.get('api_key'):
+            try:
+                batch_verifier = BatchVerifier()
+                items = [
+                    (f"video-{i}", text, video['title'])
+                    for i, (video, text, _, _) in enumerate(pending)
+                ]
+                verified = batch_verifier.verify_many(items)
+            except Exception as e:
+                logger.error(f"Batch 校验失败: {e}")
+                # 回退：短文本打包成少量实时请求完成校验，而不是全部放弃
+                if self.verifier and hasattr(self.verifier, 'verify_text_many'):
+                    logger.info("回退为打包的实时校验请求...")
+                    try:
+                        many = self.verifier.verify_text_many(
+                            [(text, video['title']) for video, text, _, _ in pending]
+                        )
+                        verified = {
+                            f"video-{i}": result['text']
+                            for i, result in enumerate(many)
+                            if result and result.get('text')
+                        }
+                    except Exception as e2:
+                        logger.error(f"打包校验回退失败: {e2}")
+
+        success = 0
+        for i, (video, text, segments, source) in enumerate(pending):
+            verification_info = None
+            result_text = verified.get(f"video-{i}")
+            if result_text:
+                text = result_text
+                verification_info = {
+                    'text': result_text,
+                    'changes': '已由大模型校验和优化',
+                }
 
-            except KeyboardInterrupt:
-                logger.info("\n\n用户中断，正在退出...")
-                break
+            try:
+                self.md_generator.generate(
+                    video,
+                    text,
+                    segments if source == "asr" else None,
+                    source,
+                    verification_info
+                )
+                if job_store:
+                    job_store.mark_done(self._job_key(video))
+                success += 1
             except Exception as e:
                 logger.error(f"处理出错: {e}")
                 failed += 1
-                continue
 
         logger.info(f"\n{'='*60}")
         logger.info(f"处理完成！")
         logger.info(f"  成功: {success}")
         logger.info(f"  失败: {failed}")
+        if skipped:
+            logger.info(f"  跳过: {skipped}")
         logger.info(f"{'='*60}\n")
 
         return {
             'total': total,
             'success': success,
             'failed': failed,
+            'skipped': skipped,
         }
 
+    def process_videos(
+        self,
+        videos: List[Dict],
+        force_asr: bool = False,
+        use_batch_api: bool = False,
+        resume: bool = False
+    ) -> Dict[str, int]:
+        """
+        批量处理视频
+
+        Args:
+            videos: 视频列表
+            force_asr: 是否强制使用语音识别
+            use_batch_api: 是否通过 Batch API 统一提交校验
+            resume: 是否跳过上次运行已完成的视频、复用已提取的文本
+
+        Returns:
+            处理统计信息
+        """
+        total = len(videos)
+        success = 0
+        failed = 0
+        skipped = 0
+
+        logger.info(f"\n开始处理 {total} 个视频...")
+
+        # 进度始终落盘，下次带 --resume 即可从中断处继续
+        try:
+            job_store = JobStore(config.output_dir / '.vtw_jobs.sqlite')
+        except sqlite3.Error as e:
+            logger.warning(f"断点续跑状态存储不可用: {e}")
+            job_store = None
+
+        try:
+            if use_batch_api:
+                try:
+                    return self._process_videos_batch(
+                        videos, force_asr, job_store, resume
+                    )
+                except KeyboardInterrupt:
+                    logger.info("\n\n用户中断，正在退出...")
+                    return {'total': total, 'success': success, 'failed': failed}
+
+            # 校验器支持异步时走并发管线：提取仍串行，LLM 校验并发执行
+            if total > 1 and self.verifier and hasattr(self.verifier, 'verify_text_async'):
+                try:
+                    stats = asyncio.run(self._process_videos_async(
+                        videos, force_asr, job_store, resume
+                    ))
+                except KeyboardInterrupt:
+                    logger.info("\n\n用户中断，正在退出...")
+                    return {'total': total, 'success': success, 'failed': failed}
+
+                logger.info(f"\n{'='*60}")
+                logger.info(f"处理完成！")
+                logger.info(f"  成功: {stats['success']}")
+                logger.info(f"  失败: {stats['failed']}")
+                if stats.get('skipped'):
+                    logger.info(f"  跳过: {stats['skipped']}")
+                logger.info(f"{'='*60}\n")
+                return stats
+
+            for idx, video in enumerate(videos, 1):
+                logger.info(f"\n[{idx}/{total}]")
+
+                # 已完成的视频直接跳过
+                if job_store and resume and \
+                        job_store.stage(self._job_key(video)) == 'done':
+                    logger.info(f"已完成，跳过: {video['title']}")
+                    skipped += 1
+                    continue
+
+                try:
+                    result = self.process_video(
+                        video, force_asr,
+                        job_store=job_store, resume=resume
+                    )
+
+                    if result:
+                        success += 1
+                    else:
+                        failed += 1
+
+                    # 请求间隔
+                    if idx < total:
+                        delay = config.delay_between_requests
+                        if delay > 0:
+                            time.sleep(delay)
+
+                except KeyboardInterrupt:
+                    logger.info("\n\n用户中断，正在退出...")
+                    break
+                except Exception as e:
+                    logger.error(f"处理出错: {e}")
+                    failed += 1
+                    continue
+
+            logger.info(f"\n{'='*60}")
+            logger.info(f"处理完成！")
+            logger.info(f"  成功: {success}")
+            logger.info(f"  失败: {failed}")
+            if skipped:
+                logger.info(f"  跳过: {skipped}")
+            logger.info(f"{'='*60}\n")
+
+            return {
+                'total': total,
+                'success': success,
+                'failed': failed,
+                'skipped': skipped,
+            }
+        finally:
+            if job_store:
+                job_store.close()
+
 
 def main():
     """主函数"""
@@ -411,6 +1004,16 @@ def main():
         action='store_true',
         help='强制使用语音识别（不下载字幕）'
     )
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='通过 Batch API 统一提交校验（费用减半，适合离线跑批）'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='断点续跑：跳过上次已完成的视频，复用已提取的转写文本'
+    )
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
@@ -471,7 +1074,10 @@ def main():
 
             # 批量处理
             processor = VideoProcessor()
-            stats = processor.process_videos(videos, args.asr)
+            stats = processor.process_videos(
+                videos, args.asr,
+                use_batch_api=args.batch, resume=args.resume
+            )
 
             if stats['failed'] == 0:
                 sys.exit(0)